@@ -7,11 +7,14 @@ Pedro - PM Motorparts
 
 import streamlit as st
 import io
-import tempfile
-from pathlib import Path
+import copy
 from datetime import datetime
-import pandas as pd
 import traceback
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # ============================================================================
 # CONFIGURAÇÃO DA PÁGINA
@@ -30,8 +33,9 @@ st.set_page_config(
 
 from core.feed import parse_feed
 from core.excel import ExcelBuilder, create_single_ref_excel
-from core.selenium_utils import build_driver
+from core.selenium_utils import DriverPool, HttpDriver
 from core.normalization import normalize_reference
+from config import STORE_MAX_CONSECUTIVE_FAILURES, PARTIAL_EXCEL_MIN_INTERVAL, UI_UPDATE_MIN_INTERVAL
 
 from scrapers.wrs import WRSScraper
 from scrapers.omniaracing import OmniaRacingScraper
@@ -44,14 +48,658 @@ from scrapers.emmoto import EMMotoScraper
 # CONSTANTES
 # ============================================================================
 
-AVAILABLE_SCRAPERS = {
-    "WRS": WRSScraper,
-    "OmniaRacing": OmniaRacingScraper,
-    "GenialMotor": GenialMotorScraper,
-    "JBS Motos": JBSMotosScraper,
-    "MMG Racing": MMGRacingStoreScraper,
-    "EM Moto": EMMotoScraper,
-}
+# (nome para display, chave interna, classe) - chave pré-calculada, sem
+# transformações de strings nos loops
+AVAILABLE_SCRAPERS = [
+    ("WRS", "wrs", WRSScraper),
+    ("OmniaRacing", "omniaracing", OmniaRacingScraper),
+    ("GenialMotor", "genialmotor", GenialMotorScraper),
+    ("JBS Motos", "jbsmotos", JBSMotosScraper),
+    ("MMG Racing", "mmgracing", MMGRacingStoreScraper),
+    ("EM Moto", "emmoto", EMMotoScraper),
+]
+
+STORE_DISPLAY_NAMES = [display_name for display_name, _, _ in AVAILABLE_SCRAPERS]
+STORE_DISPLAY_BY_KEY = {store_key: display_name for display_name, store_key, _ in AVAILABLE_SCRAPERS}
+SCRAPER_CLASS_BY_KEY = {store_key: scraper_class for _, store_key, scraper_class in AVAILABLE_SCRAPERS}
+
+
+def select_scrapers(selected_stores):
+    """
+    Filtra AVAILABLE_SCRAPERS pelas lojas escolhidas na UI.
+    
+    Args:
+        selected_stores: Nomes de display selecionados
+        
+    Returns:
+        Lista de (display_name, store_key, scraper_class)
+    """
+    selected_stores_set = set(selected_stores)
+    return [entry for entry in AVAILABLE_SCRAPERS if entry[0] in selected_stores_set]
+
+# ============================================================================
+# FUNÇÕES EM CACHE (sobrevivem aos reruns do Streamlit)
+# ============================================================================
+
+@st.cache_data(max_entries=8, ttl="1h", show_spinner=False)
+def cached_parse_feed(xml_bytes: bytes):
+    """
+    Parse do feed em cache, chaveado pelos bytes do ficheiro.
+    
+    O Streamlit corre o script todo a cada interação - sem cache o mesmo
+    XML seria relido em cada clique. max_entries limita a memória usada.
+    
+    Args:
+        xml_bytes: Conteúdo do ficheiro XML carregado
+        
+    Returns:
+        Lista de FeedProduct
+    """
+    return parse_feed(io.BytesIO(xml_bytes))
+
+@st.cache_resource(show_spinner=False)
+def get_driver_pool(headless: bool) -> DriverPool:
+    """
+    Pool de Chrome partilhado entre reruns e sessões (evita arrancar Chrome
+    a cada clique).
+    
+    Cada pesquisa em curso tem o seu driver (acquire/release): uma corrida
+    interrompida não partilha drivers com a seguinte.
+    
+    Args:
+        headless: Chrome invisível ou não (faz parte da chave da cache)
+        
+    Returns:
+        DriverPool
+    """
+    return DriverPool(headless=headless)
+
+
+def open_store_driver(scraper, driver_pool: DriverPool):
+    """
+    Driver exclusivo para pesquisar numa loja: HttpDriver para lojas com
+    HTML estático, Chrome do pool para as que precisam de JavaScript.
+    
+    Args:
+        scraper: Instância do scraper
+        driver_pool: Pool de Chrome (ver get_driver_pool)
+        
+    Returns:
+        webdriver.Chrome ou HttpDriver
+    """
+    if not scraper.requires_js:
+        return HttpDriver()
+    return driver_pool.acquire()
+
+
+def close_store_driver(driver, driver_pool: DriverPool) -> None:
+    """Fecha a sessão HTTP ou devolve o Chrome ao pool (ver open_store_driver)."""
+    if isinstance(driver, HttpDriver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    else:
+        driver_pool.release(driver)
+
+
+class _LookupFailed(Exception):
+    """Pesquisa falhou - levantada só para o st.cache_data não guardar o resultado."""
+
+
+@st.cache_resource(show_spinner=False)
+def _lookup_versions() -> dict:
+    """
+    Versão de cada (loja, ref) no memo do cached_lookup, partilhada entre
+    reruns e sessões: uma pesquisa forçada incrementa-a e invalida só essa
+    entrada (as antigas deixam de ser pedidas e expiram pelo TTL).
+    
+    Returns:
+        Dict {(store_key, ref_norm): versão}
+    """
+    return {}
+
+
+@st.cache_data(ttl="24h", max_entries=10000, show_spinner=False)
+def cached_lookup(store_key: str, ref_norm: str, ref_raw: str, ref_parts,
+                  version: int, _scraper, _driver):
+    """
+    Pesquisa (loja, ref) em cache do Streamlit - reruns com os mesmos inputs
+    não voltam a chamar o scraper.
+    
+    Chave = (store_key, ref_norm, ref_raw, ref_parts, version). Os argumentos
+    com "_" (scraper e driver) não são hashed pelo Streamlit.
+    
+    Args:
+        store_key: Chave da loja (ex: "jbsmotos")
+        ref_norm: Referência normalizada
+        ref_raw: Referência original
+        ref_parts: Partes da ref, em forma hashable (tuple)
+        version: Versão da entrada (ver _lookup_versions)
+        _scraper: Instância do scraper da loja
+        _driver: WebDriver/HttpDriver a usar se não houver cache
+        
+    Returns:
+        SearchResult ou None
+    """
+    errors_before = _scraper.stats["errors"]
+    
+    result = _scraper.search_with_cache(
+        driver=_driver,
+        ref_norm=ref_norm,
+        ref_parts=list(ref_parts) if isinstance(ref_parts, tuple) else ref_parts,
+        ref_raw=ref_raw,
+        use_cache=True
+    )
+    
+    # Erro da loja (engolido pelo scraper): não guardar o None em cache
+    if _scraper.stats["errors"] > errors_before:
+        raise _LookupFailed(store_key)
+    
+    return result
+
+
+def lookup(store_key: str, scraper, driver, ref_norm: str, ref_parts, 
+           ref_raw: str, use_cache: bool = True):
+    """
+    Pesquisa numa loja: via cached_lookup se a cache estiver ativa,
+    senão chama o scraper diretamente (força pesquisa nova).
+    
+    Uma pesquisa forçada atualiza a cache da loja e muda a versão desta
+    (loja, ref) no memo do cached_lookup - senão as corridas seguintes com
+    cache continuavam a ver o resultado antigo (até 24h).
+    
+    Returns:
+        SearchResult ou None
+    """
+    if not use_cache:
+        errors_before = scraper.stats["errors"]
+        result = scraper.search_with_cache(
+            driver=driver, ref_norm=ref_norm, ref_parts=ref_parts,
+            ref_raw=ref_raw, use_cache=False
+        )
+        
+        # Erros não substituem o que está em cache
+        if scraper.stats["errors"] == errors_before:
+            scraper.cache_result(ref_norm, result)
+            versions = _lookup_versions()
+            versions[(store_key, ref_norm)] = versions.get((store_key, ref_norm), 0) + 1
+        return result
+    
+    if isinstance(ref_parts, list):
+        ref_parts = tuple(ref_parts)
+    
+    try:
+        version = _lookup_versions().get((store_key, ref_norm), 0)
+        return cached_lookup(store_key, ref_norm, ref_raw, ref_parts, version, scraper, driver)
+    except _LookupFailed:
+        return None
+
+
+def needs_driver(scraper, ref_norm: str, use_cache: bool = True) -> bool:
+    """
+    True se a ref tem de ir à loja - refs na cache da loja são lidas sem
+    driver (evita arrancar Chrome só para ler a cache).
+    
+    Args:
+        scraper: Instância do scraper
+        ref_norm: Referência normalizada a pesquisar
+        use_cache: Usar cache de resultados
+        
+    Returns:
+        True se é preciso um driver
+    """
+    return not use_cache or scraper.cache.peek(ref_norm) is None
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_scraper(store_key: str):
+    """Scraper da loja partilhado entre reruns (lê a cache da loja do disco uma vez)."""
+    return SCRAPER_CLASS_BY_KEY[store_key]()
+
+
+def get_scraper(store_key: str):
+    """
+    Scraper para uma corrida.
+    
+    Cópia do scraper partilhado: a cache da loja (StoreCache, thread-safe) é
+    a mesma entre reruns e sessões, as estatísticas são só desta corrida -
+    uma corrida interrompida que ainda esteja a terminar não mexe nas
+    estatísticas da seguinte.
+    
+    Args:
+        store_key: Chave da loja (ex: "jbsmotos")
+        
+    Returns:
+        Instância de BaseScraper com estatísticas a zero
+    """
+    scraper = copy.copy(_shared_scraper(store_key))
+    scraper.reset_stats()
+    return scraper
+
+def new_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Executor para pesquisar lojas em paralelo.
+    
+    As threads herdam o ScriptRunContext desta execução do script: os
+    workers usam st.cache_data/st.cache_resource (cached_lookup), que sem
+    contexto avisam "missing ScriptRunContext" em cada chamada. Os workers
+    continuam a não tocar em widgets.
+    
+    Args:
+        max_workers: Máximo de threads
+        
+    Returns:
+        ThreadPoolExecutor
+    """
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx())
+    )
+
+
+def search_store(store_key: str, scraper, driver_pool: DriverPool, ref_norm: str,
+                 ref_parts, ref_raw: str, use_cache: bool = True):
+    """
+    Pesquisa uma ref numa loja com driver exclusivo (busca rápida).
+    
+    Corre numa thread. O driver só é aberto se a ref não estiver em cache
+    e é devolvido no fim da pesquisa.
+    
+    Returns:
+        SearchResult ou None
+    """
+    driver = None
+    try:
+        if needs_driver(scraper, ref_norm, use_cache):
+            driver = open_store_driver(scraper, driver_pool)
+        return lookup(
+            store_key=store_key,
+            scraper=scraper,
+            driver=driver,
+            ref_norm=ref_norm,
+            ref_parts=ref_parts,
+            ref_raw=ref_raw,
+            use_cache=use_cache
+        )
+    finally:
+        if driver is not None:
+            close_store_driver(driver, driver_pool)
+
+# ============================================================================
+# PROCESSAMENTO DO FEED (fragment)
+# ============================================================================
+
+def store_worker(store_key: str, scraper, driver_pool: DriverPool, products, ref_checkpoints,
+                 use_cache: bool, out_queue: queue.Queue, stop_event: threading.Event) -> None:
+    """
+    Percorre todas as refs numa loja, ao ritmo dessa loja.
+    
+    Corre numa thread (não toca em widgets): cada resultado é publicado em
+    out_queue como (store_key, ref_idx, result, status, erro), com status
+    "ok", "checkpoint" (já pesquisada antes), "aborted" (loja abandonada)
+    ou "error". Uma loja lenta não atrasa as outras.
+    
+    O driver só é aberto na primeira ref que não está em cache e é devolvido
+    quando o worker termina - mesmo que a corrida já tenha sido interrompida,
+    nunca é usado por dois workers ao mesmo tempo.
+    
+    Args:
+        store_key: Chave da loja
+        scraper: Instância do scraper
+        driver_pool: Pool de Chrome (ver get_driver_pool)
+        products: Lista de FeedProduct
+        ref_checkpoints: Por ref, dict {store_key: resultado} já obtido
+        use_cache: Usar cache de resultados
+        out_queue: Fila lida pela thread principal
+        stop_event: Sinal para parar (corrida interrompida)
+    """
+    # Refs repetidas no feed (variantes) só vão à loja uma vez por corrida,
+    # mesmo sem cache (pesquisa forçada)
+    run_results = {}
+    
+    # Erros seguidos desta loja nesta corrida (hits de cache também contam
+    # como resposta válida e fazem reset)
+    consecutive_failures = 0
+    
+    driver = None
+    try:
+        for ref_idx, product in enumerate(products):
+            if stop_event.is_set():
+                return
+            
+            # Já pesquisada numa corrida anterior
+            if store_key in ref_checkpoints[ref_idx]:
+                out_queue.put((store_key, ref_idx, ref_checkpoints[ref_idx][store_key], "checkpoint", None))
+                continue
+            
+            if product.ref_norm in run_results:
+                out_queue.put((store_key, ref_idx, run_results[product.ref_norm], "ok", None))
+                continue
+            
+            # Circuit breaker: restantes refs ficam sem resultado
+            if scraper.stats["aborted"]:
+                out_queue.put((store_key, ref_idx, None, "aborted", None))
+                continue
+            
+            # Erro decidido por chamada: o scraper engole exceções e só conta em
+            # stats["errors"] (mesmo critério do cached_lookup)
+            errors_before = scraper.stats["errors"]
+            try:
+                if driver is None and needs_driver(scraper, product.ref_norm, use_cache):
+                    driver = open_store_driver(scraper, driver_pool)
+                result = lookup(
+                    store_key=store_key,
+                    scraper=scraper,
+                    driver=driver,
+                    ref_norm=product.ref_norm,
+                    ref_parts=product.ref_parts,
+                    ref_raw=product.ref_raw,
+                    use_cache=use_cache
+                )
+                error = None
+            except Exception as e:
+                result, error = None, str(e)
+            
+            if error is None and scraper.stats["errors"] == errors_before:
+                consecutive_failures = 0
+                run_results[product.ref_norm] = result
+                out_queue.put((store_key, ref_idx, result, "ok", None))
+                continue
+            
+            # Erro (levantado ou engolido pelo scraper) - loja em baixo/bloqueada?
+            consecutive_failures += 1
+            if consecutive_failures >= STORE_MAX_CONSECUTIVE_FAILURES:
+                scraper.stats["aborted"] = f"{consecutive_failures} erros seguidos"
+            out_queue.put((store_key, ref_idx, None, "error", error))
+    finally:
+        # Só aqui o driver fica livre (a pesquisa em curso já terminou)
+        if driver is not None:
+            close_store_driver(driver, driver_pool)
+
+
+@st.fragment
+def run_comparison(products, selected_stores, use_cache: bool, headless: bool,
+                   max_parallel: int):
+    """
+    Pesquisa as refs selecionadas em todas as lojas e gera o Excel.
+    
+    Corre como fragment: interações com widgets do próprio bloco (ex: o
+    download parcial) só voltam a correr esta função, com os mesmos
+    argumentos, em vez do script inteiro. As refs já feitas vêm do
+    checkpoint (mesmo com a cache desligada) e não voltam a ir às lojas;
+    o histórico é refeito de raiz em cada execução. Os resultados ficam
+    no session state, por isso o download final sobrevive a reruns.
+    
+    Args:
+        products: Lista de FeedProduct a processar
+        selected_stores: Nomes de display das lojas (ver AVAILABLE_SCRAPERS)
+        use_cache: Usar cache de resultados
+        headless: Chrome invisível
+        max_parallel: Máximo de lojas pesquisadas ao mesmo tempo
+    """
+    # Container principal de processamento
+    process_container = st.container()
+    
+    with process_container:
+        st.divider()
+        st.header("⚙️ Processamento em Curso")
+        
+        # Criar scrapers
+        scrapers = {}
+        for _, store_key, _ in select_scrapers(selected_stores):
+            scrapers[store_key] = get_scraper(store_key)
+        
+        # Resultados já obtidos nesta corrida (rerun do fragment) ou numa
+        # corrida anterior interrompida são reaproveitados
+        checkpoint = st.session_state.comp_checkpoint
+        
+        # Histórico e contagem voltam a ser escritos para todas as refs (as
+        # do checkpoint incluídas), por isso começam vazios em cada execução
+        st.session_state.comp_historico = []
+        st.session_state.comp_refs_processadas = 0
+        
+        # Um driver por loja (WebDriver não é thread-safe): cada loja tem o
+        # seu worker, que percorre as refs em paralelo com as outras lojas
+        # (até max_parallel; as restantes esperam por um worker livre)
+        executor = new_executor(min(len(scrapers), max_parallel))
+        
+        # Chrome só arranca dentro do worker (primeira ref fora da cache):
+        # no máximo max_parallel em uso, e o pool não guarda mais do que isso
+        driver_pool = get_driver_pool(headless)
+        driver_pool.set_max_idle(max_parallel)
+        stop_event = threading.Event()
+        
+        # Excel: linhas por serializar desde o último buffer
+        builder = None
+        excel_dirty = False
+        last_excel_time = 0.0
+        
+        try:
+            # Criar Excel builder
+            builder = ExcelBuilder(list(scrapers.keys()), engine="xlsxwriter")
+            builder._create_headers()
+            st.session_state.comp_builder = builder
+            
+            # Progress containers
+            overall_progress = st.progress(0)
+            overall_status = st.empty()
+            
+            # Download parcial: um só slot, substituído a cada ref (não acumula
+            # colunas/botões por ref)
+            download_slot = st.empty()
+            
+            # Encontrados por loja (para o resumo final)
+            found_by_store = {store_key: 0 for store_key in scrapers}
+            
+            # Só atualizar a barra quando a percentagem inteira muda
+            # (cada update é uma mensagem websocket para o browser)
+            n_products = len(products)
+            n_stores = len(scrapers)
+            last_pct = -1
+            last_ui = 0.0
+            
+            # Um st.status por ref, criado já: cada loja avança ao seu ritmo,
+            # por isso várias refs podem estar em curso ao mesmo tempo.
+            # O progresso vai no label (um só widget por ref)
+            ref_views = []
+            for ref_idx, product in enumerate(products):
+                ref_label = f"🔍 Ref {ref_idx + 1}: {product.ref_raw}"
+                with st.status(f"{ref_label} - 0/{n_stores} lojas",
+                               expanded=(ref_idx == 0)) as ref_box:  # Expandir só a primeira
+                    store_status = st.empty()
+                    store_log = st.empty()
+                ref_views.append((ref_label, ref_box, store_status, store_log))
+            
+            # Resultados por ref (começa pelas lojas já no checkpoint - os workers
+            # reenviam-nas sem pesquisar)
+            ref_checkpoints = [checkpoint.setdefault(product.ref_norm, {}) for product in products]
+            ref_results = [{} for _ in products]
+            ref_logs = [[] for _ in products]  # Erros por ref, mostrados quando a ref fecha
+            
+            # Produtor/consumidor: um worker por loja percorre todas as refs e
+            # publica na fila; a thread principal consome (widgets só aqui)
+            result_queue = queue.Queue()
+            worker_futures = [
+                executor.submit(
+                    store_worker, store_key, scraper, driver_pool, products,
+                    ref_checkpoints, use_cache, result_queue, stop_event
+                )
+                for store_key, scraper in scrapers.items()
+            ]
+            warned_aborted = set()
+            next_ref = 0  # Próxima ref a entrar no Excel (mantém ordem do feed)
+            
+            while next_ref < n_products:
+                try:
+                    store_key, ref_idx, result, status, error = result_queue.get(timeout=1)
+                
+                except queue.Empty:
+                    # Workers terminaram sem publicar tudo (erro inesperado):
+                    # refs em falta ficam sem resultado nessas lojas
+                    if not all(f.done() for f in worker_futures) or not result_queue.empty():
+                        continue
+                    for product_results in ref_results[next_ref:]:
+                        for store_key in scrapers:
+                            product_results.setdefault(store_key, None)
+                
+                else:
+                    store_display = STORE_DISPLAY_BY_KEY[store_key]
+                    product_results = ref_results[ref_idx]
+                    product_results[store_key] = result
+                    
+                    if status == "ok":
+                        # Checkpoint (erros não entram - voltam a ser tentados)
+                        ref_checkpoints[ref_idx][store_key] = result
+                    elif status == "error":
+                        if error:
+                            ref_logs[ref_idx].append(f"⚠️ Erro em {store_display}: {error[:50]}")
+                        
+                        # Circuit breaker disparou no worker desta loja
+                        aborted = scrapers[store_key].stats["aborted"]
+                        if aborted and store_key not in warned_aborted:
+                            warned_aborted.add(store_key)
+                            st.warning(
+                                f"⛔ {store_display} abandonada nesta corrida "
+                                f"({aborted}) - restantes refs ficam sem resultado"
+                            )
+                    
+                    # Progresso intermédio é descartável (o estado final da ref é
+                    # sempre escrito abaixo), por isso limitamos a frequência
+                    now = time.monotonic()
+                    if now - last_ui >= UI_UPDATE_MIN_INTERVAL:
+                        ref_label, ref_box, _, _ = ref_views[ref_idx]
+                        ref_box.update(label=f"{ref_label} - {len(product_results)}/{n_stores} lojas "
+                                             f"(última: {store_display})")
+                        last_ui = now
+                
+                # Refs completas (todas as lojas responderam) entram no Excel por ordem
+                while next_ref < n_products and len(ref_results[next_ref]) == n_stores:
+                    ref_idx = next_ref
+                    product = products[ref_idx]
+                    product_results = {store_key: ref_results[ref_idx][store_key] for store_key in scrapers}
+                    next_ref += 1
+                    
+                    # Mostrar resultado desta ref
+                    # Uma só passagem: lojas com resultado + contagem para o resumo
+                    successful_stores = []
+                    for store_key, result in product_results.items():
+                        if result:
+                            successful_stores.append(STORE_DISPLAY_BY_KEY[store_key])
+                            found_by_store[store_key] += 1
+                    found = len(successful_stores)
+                    
+                    ref_label, ref_box, store_status, store_log = ref_views[ref_idx]
+                    if found > 0:
+                        ref_box.update(label=f"✅ {ref_label} - {found}/{n_stores} lojas", state="complete")
+                        store_status.success(
+                            f"✅ Ref completa! Encontrado em {found}/{n_stores} lojas: " + 
+                            ", ".join(successful_stores)
+                        )
+                    else:
+                        ref_box.update(label=f"❌ {ref_label} - não encontrado", state="complete")
+                        store_status.warning(f"❌ Não encontrado em nenhuma loja")
+                    if ref_logs[ref_idx]:
+                        store_log.code("\n".join(ref_logs[ref_idx]), language=None)
+                    
+                    # Update overall progress
+                    pct = (ref_idx + 1) * 100 // n_products
+                    if pct != last_pct:
+                        overall_progress.progress(pct / 100)
+                        overall_status.info(
+                            f"📦 Produto {ref_idx + 1}/{n_products}: **{product.ref_raw}** - {product.title[:50]}"
+                        )
+                        last_pct = pct
+                    
+                    # Adicionar produto ao Excel
+                    builder.add_product(product, product_results)
+                    st.session_state.comp_refs_processadas = ref_idx + 1
+                    
+                    # Atualizar histórico
+                    hist_line = f"✅ Ref {ref_idx + 1}: {product.ref_raw} - {product.title[:40]} ({found}/{n_stores} lojas)"
+                    st.session_state.comp_historico.append(hist_line)
+                    
+                    # Guardar Excel parcial no session state - no máximo a cada
+                    # PARTIAL_EXCEL_MIN_INTERVAL s (o final é gerado no fim)
+                    excel_dirty = True
+                    if time.monotonic() - last_excel_time < PARTIAL_EXCEL_MIN_INTERVAL:
+                        continue
+                    
+                    partial_buffer = builder.to_buffer()
+                    st.session_state.comp_excel_buffer = partial_buffer.getvalue()
+                    excel_dirty = False
+                    last_excel_time = time.monotonic()
+                    
+                    # Gravar também a cache das lojas. Na mesma sessão, "Retomar"
+                    # usa o checkpoint; se o processo cair (Chrome/OOM) o checkpoint
+                    # perde-se, mas uma corrida nova com cache lê do disco as
+                    # pesquisas já feitas (só as restantes vão às lojas)
+                    for scraper in scrapers.values():
+                        scraper.save_cache()
+                    
+                    # Mostrar botão de download parcial
+                    with download_slot.container():
+                        col1, col2 = st.columns([2, 1])
+                        with col1:
+                            st.info(f"💾 **{ref_idx + 1} de {n_products}** refs processadas")
+                        with col2:
+                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                            st.download_button(
+                                label=f"📥 Download Parcial ({ref_idx + 1}/{n_products})",
+                                data=st.session_state.comp_excel_buffer,
+                                file_name=f"comparador_parcial_{timestamp}.xlsx",
+                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                key=f"partial_download_{ref_idx}"
+                            )
+        
+        finally:
+            # Excel com todas as refs processadas (fim da corrida ou interrupção)
+            if builder is not None and excel_dirty:
+                st.session_state.comp_excel_buffer = builder.to_buffer().getvalue()
+            
+            # Parar workers (ex: script interrompido) - cada worker devolve o
+            # seu driver ao pool quando acabar a pesquisa em curso
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+            # Gravar cache das lojas em disco (sobrevive a restarts da app)
+            for scraper in scrapers.values():
+                scraper.save_cache()
+        
+        # Resumo por loja (uma tabela no ecrã final em vez de widgets por loja)
+        st.session_state.comp_resumo = [
+            {
+                "Loja": STORE_DISPLAY_BY_KEY[store_key],
+                "Encontrados": found_by_store[store_key],
+                "Taxa": f"{found_by_store[store_key] / max(len(products), 1) * 100:.0f}%",
+                "Erros": scraper.stats["errors"],
+                "Estado": f"⛔ {scraper.stats['aborted']}" if scraper.stats["aborted"] else "✅",
+            }
+            for store_key, scraper in scrapers.items()
+        ]
+        
+        # Lojas abandonadas pelo circuit breaker ficam registadas no histórico
+        for store_key, scraper in scrapers.items():
+            if scraper.stats["aborted"]:
+                st.session_state.comp_historico.append(
+                    f"⛔ {STORE_DISPLAY_BY_KEY[store_key]} abandonada: {scraper.stats['aborted']} (resultados parciais)"
+                )
+        
+        # Processamento completo
+        overall_progress.progress(1.0)
+        overall_status.success(f"✅ **Comparação Completa!** {len(products)} refs processadas")
+        
+        # Marcar como não processando
+        st.session_state.comp_processando = False
+        st.session_state.comp_progresso = 100
+        
+        # Corrida completa - checkpoint já não é preciso
+        st.session_state.comp_interrompida = False
+        checkpoint.clear()
+        
+        # Forçar rerun para mostrar resultado final
+        st.rerun()
 
 # ============================================================================
 # INICIALIZAÇÃO DO SESSION STATE
@@ -61,6 +709,9 @@ AVAILABLE_SCRAPERS = {
 if 'busca_resultados' not in st.session_state:
     st.session_state.busca_resultados = None
     
+if 'busca_encontrados' not in st.session_state:
+    st.session_state.busca_encontrados = 0
+    
 if 'busca_excel' not in st.session_state:
     st.session_state.busca_excel = None
     
@@ -85,6 +736,29 @@ if 'comp_progresso' not in st.session_state:
 if 'comp_builder' not in st.session_state:
     st.session_state.comp_builder = None
 
+if 'comp_resumo' not in st.session_state:
+    st.session_state.comp_resumo = []
+
+# Checkpoint da comparação: {ref_norm: {store_key: SearchResult ou None}}
+if 'comp_checkpoint' not in st.session_state:
+    st.session_state.comp_checkpoint = {}
+
+# Corrida começada e não terminada (pode ser retomada a partir do checkpoint)
+if 'comp_interrompida' not in st.session_state:
+    st.session_state.comp_interrompida = False
+
+# Parâmetros da última corrida (argumentos de run_comparison além dos produtos)
+if 'comp_parametros' not in st.session_state:
+    st.session_state.comp_parametros = None
+
+# Refs já no Excel (completas em todas as lojas) na última corrida
+if 'comp_refs_processadas' not in st.session_state:
+    st.session_state.comp_refs_processadas = 0
+
+# Feed já lido nesta sessão: (file_id do upload, lista de FeedProduct)
+if 'feed_parsed' not in st.session_state:
+    st.session_state.feed_parsed = (None, [])
+
 # ============================================================================
 # CSS CUSTOMIZADO
 # ============================================================================
@@ -154,8 +828,8 @@ with st.sidebar:
     st.subheader("🏪 Lojas")
     selected_stores = st.multiselect(
         "Seleciona as lojas",
-        options=list(AVAILABLE_SCRAPERS.keys()),
-        default=list(AVAILABLE_SCRAPERS.keys()),
+        options=STORE_DISPLAY_NAMES,
+        default=STORE_DISPLAY_NAMES,
         help="Seleciona as lojas onde queres pesquisar preços"
     )
     
@@ -163,9 +837,15 @@ with st.sidebar:
     
     st.subheader("🔧 Opções")
     use_cache = st.toggle("Usar cache (21 dias)", value=True, 
-                          help="Cache evita pesquisas repetidas e acelera o processo")
+                          help="Cache evita pesquisas repetidas e acelera o processo. "
+                               "Desligada: pesquisa tudo de novo e atualiza a cache")
     headless = st.toggle("Modo headless", value=True,
                         help="Executar navegador em background (mais rápido)")
+    max_parallel = st.slider("Lojas em paralelo", 1, len(AVAILABLE_SCRAPERS),
+                             value=len(AVAILABLE_SCRAPERS),
+                             help="Menos lojas ao mesmo tempo = menos memória: no máximo este número "
+                                  "de Chrome abertos por pesquisa (só lojas com JS abrem Chrome, e só "
+                                  "quando a ref não está em cache)")
     
     st.divider()
     
@@ -204,6 +884,7 @@ if modo == "🔍 Busca Rápida (1 Ref)":
         with col3:
             if st.button("🔄 Nova Busca", type="secondary"):
                 st.session_state.busca_resultados = None
+                st.session_state.busca_encontrados = 0
                 st.session_state.busca_excel = None
                 st.session_state.busca_ref = None
                 st.rerun()
@@ -212,12 +893,10 @@ if modo == "🔍 Busca Rápida (1 Ref)":
         if st.session_state.busca_resultados:
             st.divider()
             st.subheader("📊 Resultados da Última Busca")
-            df = pd.DataFrame(st.session_state.busca_resultados)
-            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.dataframe(st.session_state.busca_resultados, use_container_width=True, hide_index=True)
             
-            # Estatísticas
-            found_count = sum(1 for r in st.session_state.busca_resultados 
-                            if r["Preço"] != "Não encontrado" and not r["Preço"].startswith("Erro"))
+            # Estatísticas (contadas durante a busca - não voltar a ler as strings)
+            found_count = st.session_state.busca_encontrados
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -251,51 +930,70 @@ if modo == "🔍 Busca Rápida (1 Ref)":
     
     if st.button("🚀 Buscar Agora", type="primary", use_container_width=True):
         
+        ref_clean = (ref_input or "").strip()
+        
         # Validações
-        if not ref_input or not ref_input.strip():
+        if not ref_clean:
             st.error("⚠️ Introduz uma referência!")
         elif not selected_stores:
             st.error("⚠️ Seleciona pelo menos uma loja!")
         else:
             try:
-                # Iniciar busca
-                with st.spinner("🌐 A iniciar navegador..."):
-                    driver = build_driver(headless=headless)
+                # Criar scrapers
+                scrapers = {}
+                for _, store_key, _ in select_scrapers(selected_stores):
+                    scrapers[store_key] = get_scraper(store_key)
                 
                 # Normalizar referência
-                ref_norm, _ = normalize_reference(ref_input.strip())
-                ref_parts = ref_norm.replace("-", "").lower()
+                ref_norm, ref_parts = normalize_reference(ref_clean)
                 
                 st.divider()
                 st.subheader("🔍 A pesquisar...")
                 
                 # Containers para progresso
-                results = []
+                results_by_store = {}
+                found_count = 0
                 progress_bar = st.progress(0)
                 status_container = st.container()
                 
-                # Criar scrapers
-                scrapers = {}
-                for store_name in selected_stores:
-                    scraper_class = AVAILABLE_SCRAPERS[store_name]
-                    scrapers[store_name] = scraper_class()
+                # Um aviso por loja, atualizado quando essa loja termina
+                status_msgs = {}
+                with status_container:
+                    for store_key in scrapers:
+                        status_msgs[store_key] = st.info(
+                            f"🏪 A pesquisar em **{STORE_DISPLAY_BY_KEY[store_key]}**..."
+                        )
                 
-                # Processar cada loja
-                for idx, (store_name, scraper) in enumerate(scrapers.items()):
-                    progress = (idx + 1) / len(scrapers)
-                    progress_bar.progress(progress)
+                # Lojas pesquisadas em paralelo (até max_parallel) - um driver por
+                # loja (WebDriver não é thread-safe); tempo total ≈ loja mais lenta
+                executor = new_executor(min(len(scrapers), max_parallel))
+                driver_pool = get_driver_pool(headless)
+                driver_pool.set_max_idle(max_parallel)
+                
+                try:
+                    futures = {
+                        executor.submit(
+                            search_store,
+                            store_key=store_key,
+                            scraper=scraper,
+                            driver_pool=driver_pool,
+                            ref_norm=ref_norm,
+                            ref_parts=ref_parts,
+                            ref_raw=ref_clean,
+                            use_cache=use_cache
+                        ): store_key
+                        for store_key, scraper in scrapers.items()
+                    }
                     
-                    with status_container:
-                        status_msg = st.info(f"🏪 A pesquisar em **{store_name}**...")
+                    # Recolher à medida que cada loja termina (widgets só na thread principal)
+                    for idx, future in enumerate(as_completed(futures)):
+                        store_key = futures[future]
+                        store_name = STORE_DISPLAY_BY_KEY[store_key]
+                        status_msg = status_msgs[store_key]
+                        progress_bar.progress((idx + 1) / len(scrapers))
                         
                         try:
-                            result = scraper.search_with_cache(
-                                driver=driver,
-                                ref_norm=ref_norm,
-                                ref_parts=ref_parts,
-                                ref_raw=ref_input.strip(),
-                                use_cache=use_cache
-                            )
+                            result = future.result()
                             
                             if result and result.price_num is not None:
                                 # Calcular diferença se tiver preço próprio
@@ -307,45 +1005,55 @@ if modo == "🔍 Busca Rápida (1 Ref)":
                                     except:
                                         price_diff = "—"
                                 
-                                results.append({
+                                results_by_store[store_key] = {
                                     "Loja": store_name,
                                     "Preço": f"{result.price_num:.2f}€",
                                     "Diferença": price_diff,
                                     "Confiança": f"{result.confidence:.0%}" if result.confidence else "—",
                                     "URL": result.url
-                                })
+                                }
+                                found_count += 1
                                 status_msg.success(f"✅ **{store_name}** - Encontrado!")
                             else:
-                                results.append({
+                                results_by_store[store_key] = {
                                     "Loja": store_name,
                                     "Preço": "Não encontrado",
                                     "Diferença": "—",
                                     "Confiança": "—",
                                     "URL": "—"
-                                })
+                                }
                                 status_msg.warning(f"❌ **{store_name}** - Não encontrado")
                         
                         except Exception as e:
-                            results.append({
+                            results_by_store[store_key] = {
                                 "Loja": store_name,
                                 "Preço": f"Erro: {str(e)[:30]}",
                                 "Diferença": "—",
                                 "Confiança": "—",
                                 "URL": "—"
-                            })
+                            }
                             status_msg.error(f"⚠️ **{store_name}** - Erro: {str(e)[:30]}")
                 
-                # Fechar navegador
-                driver.quit()
+                finally:
+                    # Cada pesquisa devolve o seu driver ao pool quando termina
+                    executor.shutdown(wait=False, cancel_futures=True)
+                
+                # Resultados pela ordem das lojas (não pela ordem de conclusão)
+                results = [results_by_store[store_key] for store_key in scrapers]
+                
+                # Gravar cache das lojas em disco (sobrevive a restarts da app)
+                for scraper in scrapers.values():
+                    scraper.save_cache()
                 progress_bar.empty()
                 
                 # Guardar resultados no session state
                 st.session_state.busca_resultados = results
+                st.session_state.busca_encontrados = found_count
                 st.session_state.busca_ref = ref_norm
                 
                 # Criar Excel
                 excel_buffer = create_single_ref_excel(
-                    ref=ref_input.strip(),
+                    ref=ref_clean,
                     ref_norm=ref_norm,
                     your_price=your_price,
                     store_names=selected_stores,
@@ -375,7 +1083,12 @@ else:  # "📊 Comparação Completa (Feed XML)"
         
         col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
-            st.info(f"📦 Processadas **{len(st.session_state.comp_historico)}** referências")
+            n_done = st.session_state.comp_refs_processadas
+            n_total = len(st.session_state.comp_produtos)
+            if n_done < n_total:
+                st.info(f"📦 Processadas **{n_done} de {n_total}** referências")
+            else:
+                st.info(f"📦 Processadas **{n_total}** referências")
         with col2:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             st.download_button(
@@ -394,13 +1107,32 @@ else:  # "📊 Comparação Completa (Feed XML)"
                 st.session_state.comp_processando = False
                 st.session_state.comp_progresso = 0
                 st.session_state.comp_builder = None
+                st.session_state.comp_checkpoint = {}
+                st.session_state.comp_resumo = []
+                st.session_state.comp_interrompida = False
+                st.session_state.comp_parametros = None
+                st.session_state.comp_refs_processadas = 0
                 st.rerun()
         
+        # Corrida interrompida (página fechada, Chrome caiu, erro): o Excel
+        # acima é parcial - retomar continua a partir do checkpoint
+        if st.session_state.comp_interrompida and st.session_state.comp_parametros:
+            st.warning(
+                "⚠️ **Comparação interrompida** - o Excel acima é parcial. "
+                "Retomar pesquisa só as refs/lojas que ainda não têm resultado."
+            )
+            if st.button("▶️ Retomar", type="primary"):
+                st.session_state.comp_processando = True
+                run_comparison(st.session_state.comp_produtos, **st.session_state.comp_parametros)
+        
+        # Resumo por loja
+        if st.session_state.comp_resumo:
+            st.dataframe(st.session_state.comp_resumo, use_container_width=True, hide_index=True)
+        
         # Mostrar histórico
         if st.session_state.comp_historico:
             with st.expander("📋 Histórico de Processamento", expanded=True):
-                for linha in st.session_state.comp_historico:
-                    st.text(linha)
+                st.text("\n".join(st.session_state.comp_historico))
         
         st.stop()  # Parar aqui se há resultados guardados
     
@@ -417,22 +1149,25 @@ else:  # "📊 Comparação Completa (Feed XML)"
         st.success(f"✅ Ficheiro: **{uploaded_file.name}** ({uploaded_file.size / 1024:.1f} KB)")
         
         try:
-            # Guardar temporariamente
-            tmp_path = Path(tempfile.gettempdir()) / f"feed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
-            tmp_path.write_bytes(uploaded_file.read())
-            
-            # Parse feed
-            with st.spinner("📖 A ler feed XML..."):
-                all_products = parse_feed(tmp_path)
+            # Parse feed: na sessão pelo file_id do upload (reruns não voltam a
+            # fazer hash dos bytes nem a desserializar a lista do st.cache_data);
+            # o cached_parse_feed partilha o parse entre sessões
+            feed_id, all_products = st.session_state.feed_parsed
+            if feed_id != uploaded_file.file_id:
+                with st.spinner("📖 A ler feed XML..."):
+                    all_products = cached_parse_feed(uploaded_file.getvalue())
+                st.session_state.feed_parsed = (uploaded_file.file_id, all_products)
             
             st.info(f"✅ Feed lido: **{len(all_products)} produtos encontrados**")
             
             # Preview produtos
             with st.expander("🔍 Ver produtos do feed", expanded=False):
-                for idx, p in enumerate(all_products[:20], 1):
-                    st.text(f"{idx}. {p.ref_raw} - {p.title[:60]}")
+                # Um só st.text (uma mensagem para o browser em vez de uma por linha)
+                preview_lines = [f"{idx}. {p.ref_raw} - {p.title[:60]}" 
+                                 for idx, p in enumerate(all_products[:20], 1)]
                 if len(all_products) > 20:
-                    st.text(f"... + {len(all_products) - 20} produtos")
+                    preview_lines.append(f"... + {len(all_products) - 20} produtos")
+                st.text("\n".join(preview_lines))
             
             st.divider()
             
@@ -481,18 +1216,26 @@ else:  # "📊 Comparação Completa (Feed XML)"
                 
                 if custom_input.strip():
                     try:
-                        indices = [int(x.strip()) - 1 for x in custom_input.split(",")]
+                        # Uma só passagem: converter e validar cada número
+                        tokens = custom_input.split(",")
+                        if len(tokens) > 10:
+                            st.error(f"❌ Máximo 10 refs! Selecionaste {len(tokens)}")
+                            st.stop()
+                        
+                        n_all = len(all_products)
+                        indices = []
+                        invalid = []
+                        for token in tokens:
+                            number = int(token)  # int() ignora espaços; ValueError se não for número
+                            if 1 <= number <= n_all:
+                                indices.append(number - 1)
+                            else:
+                                invalid.append(number)
                         
-                        # Validar índices
-                        invalid = [i+1 for i in indices if i < 0 or i >= len(all_products)]
                         if invalid:
                             st.error(f"❌ Números inválidos: {invalid}")
                             st.stop()
                         
-                        if len(indices) > 10:
-                            st.error(f"❌ Máximo 10 refs! Selecionaste {len(indices)}")
-                            st.stop()
-                        
                         products = [all_products[i] for i in indices]
                         
                     except ValueError:
@@ -504,8 +1247,8 @@ else:  # "📊 Comparação Completa (Feed XML)"
                 st.success(f"📌 **{len(products)} produtos selecionados** para processamento")
                 
                 with st.expander("🔍 Ver produtos selecionados", expanded=True):
-                    for idx, p in enumerate(products, 1):
-                        st.text(f"{idx}. {p.ref_raw} - {p.title[:60]}")
+                    st.text("\n".join(f"{idx}. {p.ref_raw} - {p.title[:60]}" 
+                                       for idx, p in enumerate(products, 1)))
             else:
                 if ref_selection != "Custom (escolher refs específicas)":
                     st.warning("⚠️ Não há produtos neste intervalo")
@@ -528,149 +1271,24 @@ else:  # "📊 Comparação Completa (Feed XML)"
                     st.error("⚠️ Seleciona pelo menos uma loja!")
                     st.stop()
                 
-                # Guardar produtos no session state
+                # Guardar produtos e parâmetros no session state (para retomar)
                 st.session_state.comp_produtos = products
+                st.session_state.comp_parametros = {
+                    "selected_stores": selected_stores,
+                    "use_cache": use_cache,
+                    "headless": headless,
+                    "max_parallel": max_parallel,
+                }
                 st.session_state.comp_processando = True
-                st.session_state.comp_historico = []
+                st.session_state.comp_interrompida = True
                 
-                # Container principal de processamento
-                process_container = st.container()
+                # Sem cache = pesquisa forçada: corrida nova descarta o checkpoint
+                # (reruns do fragment dentro desta corrida continuam a usá-lo)
+                if not use_cache:
+                    st.session_state.comp_checkpoint = {}
                 
-                with process_container:
-                    st.divider()
-                    st.header("⚙️ Processamento em Curso")
-                    
-                    # Criar driver
-                    with st.spinner("🌐 A iniciar navegador..."):
-                        driver = build_driver(headless=headless)
-                    
-                    # Criar scrapers
-                    scrapers = {}
-                    for store_name in selected_stores:
-                        scraper_class = AVAILABLE_SCRAPERS[store_name]
-                        scrapers[store_name.lower().replace(" ", "")] = scraper_class()
-                    
-                    # Criar Excel builder
-                    builder = ExcelBuilder(list(scrapers.keys()))
-                    builder._create_headers()
-                    st.session_state.comp_builder = builder
-                    
-                    # Progress containers
-                    overall_progress = st.progress(0)
-                    overall_status = st.empty()
-                    
-                    # Container para download parcial
-                    download_container = st.container()
-                    
-                    # Histórico visual
-                    historico_container = st.container()
-                    
-                    # Processar cada REF (ref-por-ref, não loja-por-loja)
-                    for ref_idx, product in enumerate(products):
-                        
-                        # Update overall progress
-                        progress_pct = (ref_idx + 1) / len(products)
-                        overall_progress.progress(progress_pct)
-                        overall_status.info(
-                            f"📦 Produto {ref_idx + 1}/{len(products)}: **{product.ref_raw}** - {product.title[:50]}"
-                        )
-                        
-                        # Container para esta ref
-                        with st.expander(f"🔍 Ref {ref_idx + 1}: {product.ref_raw}", 
-                                       expanded=(ref_idx == 0)):  # Expandir só a primeira
-                            
-                            store_progress = st.progress(0)
-                            store_status = st.empty()
-                            results_text = st.empty()
-                            
-                            # Resultados desta ref
-                            product_results = {}
-                            successful_stores = []
-                            
-                            # Processar cada LOJA para esta REF
-                            for store_idx, (store_key, scraper) in enumerate(scrapers.items()):
-                                
-                                store_pct = (store_idx + 1) / len(scrapers)
-                                store_progress.progress(store_pct)
-                                
-                                # Nome da loja para display
-                                store_display = [k for k, v in AVAILABLE_SCRAPERS.items() 
-                                               if k.lower().replace(" ", "") == store_key][0]
-                                
-                                store_status.text(f"🏪 A pesquisar em {store_display}... ({store_idx + 1}/{len(scrapers)})")
-                                
-                                try:
-                                    result = scraper.search_with_cache(
-                                        driver=driver,
-                                        ref_norm=product.ref_norm,
-                                        ref_parts=product.ref_parts,
-                                        ref_raw=product.ref_raw,
-                                        use_cache=use_cache
-                                    )
-                                    
-                                    if result:
-                                        product_results[store_key] = result.to_dict()
-                                        successful_stores.append(store_display)
-                                    else:
-                                        product_results[store_key] = None
-                                        
-                                except Exception as e:
-                                    product_results[store_key] = None
-                                    st.warning(f"⚠️ Erro em {store_display}: {str(e)[:50]}")
-                            
-                            # Mostrar resultado desta ref
-                            found = len(successful_stores)
-                            total = len(scrapers)
-                            
-                            if found > 0:
-                                store_status.success(
-                                    f"✅ Ref completa! Encontrado em {found}/{total} lojas: " + 
-                                    ", ".join(successful_stores)
-                                )
-                            else:
-                                store_status.warning(f"❌ Não encontrado em nenhuma loja")
-                        
-                        # Adicionar produto ao Excel
-                        builder.add_product(product, product_results)
-                        
-                        # Atualizar histórico
-                        found = sum(1 for r in product_results.values() if r)
-                        total = len(product_results)
-                        hist_line = f"✅ Ref {ref_idx + 1}: {product.ref_raw} - {product.title[:40]} ({found}/{total} lojas)"
-                        st.session_state.comp_historico.append(hist_line)
-                        
-                        # Guardar Excel parcial no session state
-                        partial_buffer = builder.to_buffer()
-                        st.session_state.comp_excel_buffer = partial_buffer.getvalue()
-                        
-                        # Mostrar botão de download parcial
-                        with download_container:
-                            col1, col2 = st.columns([2, 1])
-                            with col1:
-                                st.info(f"💾 **{ref_idx + 1} de {len(products)}** refs processadas")
-                            with col2:
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                st.download_button(
-                                    label=f"📥 Download Parcial ({ref_idx + 1}/{len(products)})",
-                                    data=st.session_state.comp_excel_buffer,
-                                    file_name=f"comparador_parcial_{timestamp}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    key=f"partial_download_{ref_idx}"
-                                )
-                    
-                    # Fechar driver
-                    driver.quit()
-                    
-                    # Processamento completo
-                    overall_progress.progress(1.0)
-                    overall_status.success(f"✅ **Comparação Completa!** {len(products)} refs processadas")
-                    
-                    # Marcar como não processando
-                    st.session_state.comp_processando = False
-                    st.session_state.comp_progresso = 100
-                    
-                    # Forçar rerun para mostrar resultado final
-                    st.rerun()
+                # Fragment: o download parcial não interrompe/reinicia a app toda
+                run_comparison(products, selected_stores, use_cache, headless, max_parallel)
                     
         except Exception as e:
             st.error(f"❌ Erro crítico: {str(e)}")
@@ -679,13 +1297,6 @@ else:  # "📊 Comparação Completa (Feed XML)"
             
             # Limpar estado em caso de erro
             st.session_state.comp_processando = False
-            
-            # Cleanup do ficheiro temporário se existir
-            try:
-                if 'tmp_path' in locals() and tmp_path.exists():
-                    tmp_path.unlink()
-            except:
-                pass
 
 
 # ============================================================================
@@ -3,12 +3,14 @@
 Comparador v4.8 - Configurações Centralizadas
 Otimizado para uso SEMANAL + Comparação ref-por-ref
 """
+import os
 from pathlib import Path
 
 # ============================================================================
 # PATHS - Alterar aqui se mudares de pasta
 # ============================================================================
-BASE_DIR = Path(r"C:\PMprecos")
+# PMPRECOS_DIR permite apontar para um volume persistente (ex: no servidor)
+BASE_DIR = Path(os.environ.get("PMPRECOS_DIR", r"C:\PMprecos"))
 FEED_PATH = BASE_DIR / "feed.xml"
 CACHE_DIR = BASE_DIR / "cache"
 OUTPUT_DIR = BASE_DIR / "output"
@@ -27,6 +29,14 @@ EXCEL_OUTPUT = OUTPUT_DIR / "comparador_todas_lojas.xlsx"
 # 10 refs × 6 lojas = 60 buscas = ~7-12 minutos (seguro)
 MAX_REFS_PER_RUN = 10
 
+# Excel parcial (download durante a corrida): regenerar no máximo a cada N segundos
+# (serializar o workbook inteiro a cada ref é O(N²) no total)
+PARTIAL_EXCEL_MIN_INTERVAL = 20
+
+# Progresso por loja na UI: no máximo uma atualização a cada N segundos
+# (cada update é uma mensagem websocket para o browser)
+UI_UPDATE_MIN_INTERVAL = 0.2
+
 # ============================================================================
 # SELENIUM - Configurações do Chrome
 # ============================================================================
@@ -35,6 +45,14 @@ WINDOW_SIZE = "1400,950"
 PAGE_LOAD_TIMEOUT = 35  # segundos
 USER_AGENT_LANGS = "en,it,pt"
 
+# ============================================================================
+# HTTP - Lojas com HTML estático (sem Chrome)
+# ============================================================================
+HTTP_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
 # ============================================================================
 # RATE LIMITING - Proteção anti-bloqueio
 # ============================================================================
@@ -51,6 +69,7 @@ BACKOFF_BASE = 2  # Base para exponential backoff
 # ============================================================================
 CIRCUIT_BREAKER_WINDOW = 20  # Janela de análise (últimos N pedidos)
 CIRCUIT_BREAKER_THRESHOLD = 0.30  # 30% de falhas = ativar modo lento
+STORE_MAX_CONSECUTIVE_FAILURES = 3  # Erros seguidos numa loja = desistir dela nesta corrida
 
 # ============================================================================
 # CACHE - Persistência em disco com TTL (Time To Live)
@@ -6,7 +6,9 @@ Cada loja tem seu próprio ficheiro JSON, TTL diferenciado por tipo.
 
 VERSÃO 4.7: TTL adaptativo (encontrados vs não encontrados)
 """
+import os
 import json
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
@@ -61,6 +63,9 @@ class StoreCache:
     """
     Cache para uma loja específica.
     Cada loja tem seu ficheiro JSON independente.
+    
+    Thread-safe: a mesma instância pode ser usada por várias threads
+    (lojas em paralelo, scrapers partilhados entre sessões do Streamlit).
     """
     
     def __init__(self, store_name: str):
@@ -72,6 +77,7 @@ class StoreCache:
         self.cache_file = CACHE_DIR / f"{store_name}_cache.json"
         self._cache: Dict[str, CacheEntry] = {}
         self._dirty = False  # Flag para saber se precisa salvar
+        self._lock = threading.RLock()
         
         # Carregar cache existente
         self._load()
@@ -98,24 +104,28 @@ class StoreCache:
     
     def save(self) -> None:
         """Salva cache no disco (só se houve mudanças)"""
-        if not self._dirty:
-            return
-        
-        try:
-            # Converter CacheEntry para dicionários
-            data = {ref: entry.to_dict() for ref, entry in self._cache.items()}
+        with self._lock:
+            if not self._dirty:
+                return
             
-            # Garantir que diretório existe
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Salvar JSON com indentação para legibilidade
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            try:
+                # Converter CacheEntry para dicionários
+                data = {ref: entry.to_dict() for ref, entry in self._cache.items()}
+                
+                # Garantir que diretório existe
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                
+                # JSON compacto (ficheiro reescrito a cada save) para ficheiro
+                # temporário + os.replace: um crash a meio não corrompe a cache
+                tmp_file = self.cache_file.with_suffix(".json.tmp")
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_file, self.cache_file)
+                
+                self._dirty = False
             
-            self._dirty = False
-        
-        except Exception as e:
-            print(f"[ERRO] Não foi possível salvar cache de {self.store_name}: {e}")
+            except Exception as e:
+                print(f"[ERRO] Não foi possível salvar cache de {self.store_name}: {e}")
     
     def get(self, ref_norm: str) -> Optional[CacheEntry]:
         """
@@ -127,16 +137,37 @@ class StoreCache:
         Returns:
             CacheEntry se encontrado e válido, None se não existe ou expirou
         """
-        entry = self._cache.get(ref_norm)
+        with self._lock:
+            entry = self._cache.get(ref_norm)
+            
+            if entry is None:
+                return None
+            
+            # Verificar se expirou (usa TTL adaptativo)
+            if entry.is_expired():
+                # Remover entrada expirada
+                del self._cache[ref_norm]
+                self._dirty = True
+                return None
+            
+            return entry
+    
+    def peek(self, ref_norm: str) -> Optional[CacheEntry]:
+        """
+        Como get(), mas só consulta: não remove entradas expiradas.
         
-        if entry is None:
-            return None
+        Serve para decidir antes da pesquisa se a loja precisa de driver.
         
-        # Verificar se expirou (usa TTL adaptativo)
-        if entry.is_expired():
-            # Remover entrada expirada
-            del self._cache[ref_norm]
-            self._dirty = True
+        Args:
+            ref_norm: Referência normalizada
+            
+        Returns:
+            CacheEntry se existe e é válida, None caso contrário
+        """
+        with self._lock:
+            entry = self._cache.get(ref_norm)
+        
+        if entry is None or entry.is_expired():
             return None
         
         return entry
@@ -162,13 +193,15 @@ class StoreCache:
             confidence=confidence
         )
         
-        self._cache[ref_norm] = entry
-        self._dirty = True
+        with self._lock:
+            self._cache[ref_norm] = entry
+            self._dirty = True
     
     def clear(self) -> None:
         """Limpa todo o cache"""
-        self._cache = {}
-        self._dirty = True
+        with self._lock:
+            self._cache = {}
+            self._dirty = True
     
     def remove_expired(self) -> int:
         """
@@ -177,16 +210,17 @@ class StoreCache:
         Returns:
             Número de entradas removidas
         """
-        expired_refs = [
-            ref for ref, entry in self._cache.items() 
-            if entry.is_expired()
-        ]
-        
-        for ref in expired_refs:
-            del self._cache[ref]
-        
-        if expired_refs:
-            self._dirty = True
+        with self._lock:
+            expired_refs = [
+                ref for ref, entry in self._cache.items() 
+                if entry.is_expired()
+            ]
+            
+            for ref in expired_refs:
+                del self._cache[ref]
+            
+            if expired_refs:
+                self._dirty = True
         
         return len(expired_refs)
     
@@ -197,15 +231,18 @@ class StoreCache:
         Returns:
             Dict com estatísticas (total, encontrados, não encontrados, etc)
         """
-        total = len(self._cache)
-        found = sum(1 for entry in self._cache.values() if entry.url)
+        with self._lock:
+            entries = list(self._cache.values())
+        
+        total = len(entries)
+        found = sum(1 for entry in entries if entry.url)
         not_found = total - found
         
         # Calcular idade média
         if total > 0:
             try:
                 ages = []
-                for entry in self._cache.values():
+                for entry in entries:
                     cached_time = datetime.fromisoformat(entry.timestamp)
                     age_hours = (datetime.utcnow() - cached_time).total_seconds() / 3600
                     ages.append(age_hours)
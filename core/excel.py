@@ -3,11 +3,13 @@
 core/excel.py
 Geração de Excel consolidado com múltiplas lojas lado-a-lado.
 v4.9.1 - Adicionado suporte para N/A amarelo quando preço existe mas não é calculável
+Engine "xlsxwriter": guarda só os valores das linhas e escreve o ficheiro de uma vez (mais rápido)
 """
 from pathlib import Path
 from typing import List, Dict, Optional
 import io
 
+import xlsxwriter
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
@@ -21,20 +23,34 @@ class ExcelBuilder:
     
     Layout:
     | ID | Título | Ref Feed | Preço Feed | Loja1 Preço | Loja1 Dif% | Loja1 URL | Loja2 Preço | Loja2 Dif% | ...
+    
+    Engines:
+        "openpyxl"   - workbook em memória, formatado célula a célula (padrão)
+        "xlsxwriter" - guarda só os valores das linhas (todas, em memória); cada
+                       to_buffer()/save() reescreve o ficheiro inteiro
     """
     
-    def __init__(self, store_names: List[str]):
+    def __init__(self, store_names: List[str], engine: str = "openpyxl"):
         """
         Args:
             store_names: Lista de nomes das lojas (ex: ["wrs", "omniaracing"])
+            engine: "openpyxl" ou "xlsxwriter"
         """
+        if engine not in ("openpyxl", "xlsxwriter"):
+            raise ValueError(f"Engine desconhecido: {engine}")
+        
         self.store_names = store_names
-        self.wb = Workbook()
-        self.ws = self.wb.active
-        self.ws.title = "Comparador"
+        self.engine = engine
+        self._rows: List[list] = []   # Linhas de dados (engine xlsxwriter)
+        self._frozen = False
         
-        # Estilos
-        self._setup_styles()
+        if engine == "openpyxl":
+            self.wb = Workbook()
+            self.ws = self.wb.active
+            self.ws.title = "Comparador"
+            
+            # Estilos
+            self._setup_styles()
     
     def _setup_styles(self):
         """Define estilos reutilizáveis"""
@@ -54,9 +70,16 @@ class ExcelBuilder:
         
         # NOVO: Amarelo para N/A (preço existe mas não calculável)
         self.yellow_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-    
-    def _create_headers(self):
-        """Cria linha de headers"""
+        
+        # Alinhamentos/fontes das linhas de dados (partilhados por todas as células)
+        self.align_vcenter = Alignment(vertical="center")
+        self.align_wrap = Alignment(vertical="center", wrap_text=True)
+        self.align_center = Alignment(horizontal="center", vertical="center")
+        self.na_font = Font(italic=True, color="C65911")  # Texto laranja escuro
+        self.link_font = Font(color="0563C1", underline="single")
+    
+    def _get_headers(self) -> List[str]:
+        """Lista de headers (fixos + 3 colunas por loja)"""
         # Headers fixos
         headers = ["ID", "Título", "Ref Feed", "Preço Feed"]
         
@@ -70,6 +93,15 @@ class ExcelBuilder:
                 f"{store_display} URL"
             ])
         
+        return headers
+    
+    def _create_headers(self):
+        """Cria linha de headers"""
+        if self.engine == "xlsxwriter":
+            return  # Headers escritos em _write_xlsxwriter
+        
+        headers = self._get_headers()
+        
         # Adicionar headers
         self.ws.append(headers)
         
@@ -100,15 +132,17 @@ class ExcelBuilder:
             self.ws.column_dimensions[get_column_letter(col_letter + 2)].width = 40  # URL
             col_letter += 3
     
-    def add_product_row(self, product: FeedProduct, 
-                       store_results: Dict[str, Optional[Dict]]):
+    def _build_row_data(self, product: FeedProduct, 
+                        store_results: Dict[str, Optional[Dict]]) -> list:
         """
-        Adiciona linha de produto.
+        Calcula valores de uma linha de produto.
         
         Args:
             product: FeedProduct do feed
-            store_results: Dict {store_name: result_dict ou None}
-                result_dict tem: url, price_text, price_num, confidence
+            store_results: Dict {store_name: SearchResult, result_dict ou None}
+            
+        Returns:
+            Lista de valores da linha
         """
         # Colunas base
         row_data = [
@@ -122,11 +156,20 @@ class ExcelBuilder:
         for store_name in self.store_names:
             result = store_results.get(store_name)
             
-            if result and result.get("price_text"):
-                # Produto encontrado
-                price_text = result["price_text"]
+            # SearchResult lido diretamente (sem to_dict); dicts ainda aceites
+            if result is None:
+                price_text = None
+            elif isinstance(result, dict):
+                price_text = result.get("price_text")
                 price_num = result.get("price_num")
                 url = result.get("url", "")
+            else:
+                price_text = result.price_text
+                price_num = result.price_num
+                url = result.url or ""
+            
+            if price_text:
+                # Produto encontrado
                 
                 # Calcular diferença %
                 diff_value = None
@@ -147,6 +190,24 @@ class ExcelBuilder:
                 # Produto não encontrado
                 row_data.extend(["--", None, ""])
         
+        return row_data
+    
+    def add_product_row(self, product: FeedProduct, 
+                       store_results: Dict[str, Optional[Dict]]):
+        """
+        Adiciona linha de produto.
+        
+        Args:
+            product: FeedProduct do feed
+            store_results: Dict {store_name: SearchResult, result_dict ou None}
+                result_dict tem: url, price_text, price_num, confidence
+        """
+        row_data = self._build_row_data(product, store_results)
+        
+        if self.engine == "xlsxwriter":
+            self._rows.append(row_data)
+            return
+        
         # Adicionar linha
         row_num = self.ws.max_row + 1
         self.ws.append(row_data)
@@ -169,7 +230,12 @@ class ExcelBuilder:
             BytesIO buffer com Excel
         """
         buffer = io.BytesIO()
-        self.wb.save(buffer)
+        
+        if self.engine == "xlsxwriter":
+            self._write_xlsxwriter(buffer)
+        else:
+            self.wb.save(buffer)
+        
         buffer.seek(0)
         return buffer
     
@@ -180,7 +246,87 @@ class ExcelBuilder:
         Args:
             path: Caminho do ficheiro
         """
-        self.wb.save(path)
+        if self.engine == "xlsxwriter":
+            self._write_xlsxwriter(str(path))
+        else:
+            self.wb.save(path)
+    
+    def _write_xlsxwriter(self, target):
+        """
+        Escreve o Excel inteiro com xlsxwriter (todas as linhas de _rows).
+        
+        constant_memory só evita que o xlsxwriter guarde objetos por célula
+        (cada linha sai logo que escrita); _rows continua a crescer com o
+        número de produtos e cada chamada reescreve o workbook completo.
+        Mesmas cores/formatos do engine openpyxl.
+        
+        Args:
+            target: Caminho (str) ou BytesIO
+        """
+        wb = xlsxwriter.Workbook(target, {"constant_memory": True})
+        ws = wb.add_worksheet("Comparador")
+        
+        border = {"border": 1, "border_color": "#CCCCCC", "valign": "vcenter"}
+        header_fmt = wb.add_format({**border, "bold": True, "font_color": "#FFFFFF", "font_size": 11,
+                                    "bg_color": "#366092", "align": "center", "text_wrap": True})
+        base_fmt = wb.add_format(border)
+        title_fmt = wb.add_format({**border, "text_wrap": True})
+        center_fmt = wb.add_format({**border, "align": "center"})
+        gray_fmt = wb.add_format({**border, "align": "center", "bg_color": "#F0F0F0"})
+        pct_fmt = wb.add_format({**border, "align": "center", "num_format": "0.0%"})
+        green_fmt = wb.add_format({**border, "align": "center", "num_format": "0.0%", "bg_color": "#C6EFCE"})
+        red_fmt = wb.add_format({**border, "align": "center", "num_format": "0.0%", "bg_color": "#FFC7CE"})
+        yellow_fmt = wb.add_format({**border, "align": "center", "bg_color": "#FFEB9C",
+                                    "italic": True, "font_color": "#C65911"})
+        url_fmt = wb.add_format({**border, "font_color": "#0563C1", "underline": 1})
+        
+        # Larguras (antes de escrever linhas)
+        ws.set_column(0, 0, 12)  # ID
+        ws.set_column(1, 1, 45)  # Título
+        ws.set_column(2, 2, 15)  # Ref Feed
+        ws.set_column(3, 3, 12)  # Preço Feed
+        for store_idx in range(len(self.store_names)):
+            col = 4 + store_idx * 3
+            ws.set_column(col, col, 12)          # Preço
+            ws.set_column(col + 1, col + 1, 10)  # Dif%
+            ws.set_column(col + 2, col + 2, 40)  # URL
+        
+        if self._frozen:
+            ws.freeze_panes(1, 0)
+        
+        ws.write_row(0, 0, self._get_headers(), header_fmt)
+        
+        for row_num, row_data in enumerate(self._rows, start=1):
+            # Colunas base (A-D)
+            ws.write(row_num, 0, row_data[0], base_fmt)
+            ws.write(row_num, 1, row_data[1], title_fmt)
+            ws.write(row_num, 2, row_data[2], base_fmt)
+            ws.write(row_num, 3, row_data[3], base_fmt)
+            
+            # Para cada loja (3 colunas por loja)
+            for col in range(4, len(row_data), 3):
+                price, diff, url = row_data[col:col + 3]
+                
+                if isinstance(diff, (int, float)):
+                    diff_fmt = green_fmt if diff > 0 else red_fmt if diff < 0 else pct_fmt
+                    ws.write(row_num, col, price, center_fmt)
+                    ws.write_number(row_num, col + 1, diff, diff_fmt)
+                elif diff == "N/A":
+                    ws.write(row_num, col, price, center_fmt)
+                    ws.write_string(row_num, col + 1, diff, yellow_fmt)
+                elif diff is None and price == "--":
+                    ws.write(row_num, col, price, gray_fmt)
+                    ws.write_blank(row_num, col + 1, None, gray_fmt)
+                else:
+                    ws.write(row_num, col, price, center_fmt)
+                    ws.write(row_num, col + 1, diff, center_fmt)
+                
+                if url and url.startswith("http"):
+                    ws.write_url(row_num, col + 2, url, url_fmt, string="🔗 Ver produto")
+                else:
+                    ws.write(row_num, col + 2, url, base_fmt)
+        
+        wb.close()
     
     def _format_row(self, row_num: int, num_stores: int):
         """
@@ -195,10 +341,10 @@ class ExcelBuilder:
         for col in range(1, 5):
             cell = self.ws.cell(row_num, col)
             cell.border = self.border
-            cell.alignment = Alignment(vertical="center")
+            cell.alignment = self.align_vcenter
         
         # Título (coluna B) - wrap text
-        self.ws.cell(row_num, 2).alignment = Alignment(vertical="center", wrap_text=True)
+        self.ws.cell(row_num, 2).alignment = self.align_wrap
         
         # Para cada loja (3 colunas por loja)
         col = 5
@@ -206,12 +352,12 @@ class ExcelBuilder:
             # Coluna preço
             price_cell = self.ws.cell(row_num, col)
             price_cell.border = self.border
-            price_cell.alignment = Alignment(horizontal="center", vertical="center")
+            price_cell.alignment = self.align_center
             
             # Coluna diferença %
             diff_cell = self.ws.cell(row_num, col + 1)
             diff_cell.border = self.border
-            diff_cell.alignment = Alignment(horizontal="center", vertical="center")
+            diff_cell.alignment = self.align_center
             
             # Formatação da diferença
             diff_value = diff_cell.value
@@ -231,7 +377,7 @@ class ExcelBuilder:
                 # NOVO: Preço existe mas não calculável (Black Friday)
                 # Mostrar com fundo amarelo de aviso
                 diff_cell.fill = self.yellow_fill
-                diff_cell.font = Font(italic=True, color="C65911")  # Texto laranja escuro
+                diff_cell.font = self.na_font
             
             elif diff_value is None and price_cell.value == "--":
                 # Produto não encontrado = CINZA
@@ -241,19 +387,22 @@ class ExcelBuilder:
             # Coluna URL
             url_cell = self.ws.cell(row_num, col + 2)
             url_cell.border = self.border
-            url_cell.alignment = Alignment(vertical="center")
+            url_cell.alignment = self.align_vcenter
             
             # Se tem URL, tornar hyperlink
             if url_cell.value and url_cell.value.startswith("http"):
                 url_cell.hyperlink = url_cell.value
-                url_cell.font = Font(color="0563C1", underline="single")
+                url_cell.font = self.link_font
                 url_cell.value = "🔗 Ver produto"
             
             col += 3
     
     def freeze_header(self):
         """Congela a primeira linha (header)"""
-        self.ws.freeze_panes = "A2"
+        self._frozen = True
+        
+        if self.engine == "openpyxl":
+            self.ws.freeze_panes = "A2"
 
 
 # Funções auxiliares para compatibilidade
@@ -274,13 +423,15 @@ def build_excel(products: List[FeedProduct],
     builder = ExcelBuilder(store_names)
     builder._create_headers()
     
+    # Resolver os dicts de cada loja uma só vez (fora do loop de produtos)
+    store_maps = [(store_name, all_results.get(store_name) or {}) 
+                  for store_name in store_names]
+    
     for product in products:
         # Coletar resultados desta ref de cada loja
-        store_results = {}
-        for store_name in store_names:
-            store_data = all_results.get(store_name, {})
-            result = store_data.get(product.ref_norm)
-            store_results[store_name] = result
+        ref_norm = product.ref_norm
+        store_results = {store_name: store_data.get(ref_norm) 
+                         for store_name, store_data in store_maps}
         
         builder.add_product_row(product, store_results)
     
@@ -304,8 +455,6 @@ def create_single_ref_excel(ref: str, ref_norm: str, your_price: float,
     Returns:
         BytesIO buffer com Excel
     """
-    import io
-    
     wb = Workbook()
     ws = wb.active
     ws.title = "Busca Rápida"
@@ -5,12 +5,13 @@ Parser de feeds XML - v4.9.1 HOTFIX
 Corrigido: Mantém lógica original de extração da descrição + parser Black Friday
 """
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import BinaryIO, List, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime
-import xml.etree.ElementTree as ET
 import re
 
+from lxml import etree
+
 from .normalization import normalize_reference, extract_ref_from_description
 
 
@@ -158,7 +159,39 @@ def _parse_single_price(price_str: str) -> Optional[float]:
         return None
 
 
-def parse_feed(feed_path: Union[str, Path], max_products: int = 0) -> List[FeedProduct]:
+def _iter_items(source):
+    """
+    Percorre os <item> do feed em streaming (lxml iterparse).
+    
+    Cada item é limpo depois de processado (e removido do pai), por isso a
+    memória não cresce com o tamanho do feed.
+    
+    Args:
+        source: Path/str ou file-like binário
+        
+    Yields:
+        Elemento <item>
+    """
+    if not hasattr(source, "read"):
+        source = str(source)
+    
+    # Feed vem de upload: não resolver entidades externas nem ir à rede
+    # (<!ENTITY x SYSTEM "file:///..."> leria ficheiros do servidor)
+    try:
+        for _, elem in etree.iterparse(source, events=("end",), tag="item",
+                                       resolve_entities=False, no_network=True):
+            yield elem
+            
+            # Libertar item já processado + irmãos anteriores
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    
+    except etree.XMLSyntaxError as e:
+        raise Exception(f"Erro ao parsear XML: {e}")
+
+
+def parse_feed(feed_path: Union[str, Path, BinaryIO], max_products: int = 0) -> List[FeedProduct]:
     """
     Parse do feed.xml e extrai produtos.
     IMPORTANTE: Referências SEMPRE vêm da descrição (campo "Ref Fabricante:")
@@ -177,35 +210,32 @@ def parse_feed(feed_path: Union[str, Path], max_products: int = 0) -> List[FeedP
         </item>
     
     Args:
-        feed_path: Caminho do ficheiro XML (Path ou str)
+        feed_path: Caminho do ficheiro XML (Path ou str) ou file-like
+            binário já aberto (ex: BytesIO de um upload - sem ficheiro temporário)
         max_products: Limite de produtos (0 = sem limite, útil para testes)
         
     Returns:
         Lista de FeedProduct (só produtos COM ref válida)
     """
-    # Converter para Path se for string
-    if isinstance(feed_path, str):
-        feed_path = Path(feed_path)
-    
-    if not feed_path.exists():
-        raise FileNotFoundError(f"Feed não encontrado: {feed_path}")
+    # File-like (ex: BytesIO) é lido diretamente; caminhos são validados
+    if not hasattr(feed_path, "read"):
+        # Converter para Path se for string
+        if isinstance(feed_path, str):
+            feed_path = Path(feed_path)
+        
+        if not feed_path.exists():
+            raise FileNotFoundError(f"Feed não encontrado: {feed_path}")
     
     # Namespace do Google Shopping
     ns = {"g": "http://base.google.com/ns/1.0"}
     
-    try:
-        tree = ET.parse(feed_path)
-        root = tree.getroot()
-    except Exception as e:
-        raise Exception(f"Erro ao parsear XML: {e}")
-    
     products = []
     total_items = 0
     skipped_no_ref = 0
     skipped_invalid_ref = 0
     
-    # IMPORTANTE: Procurar SEMPRE por .//item (não .//entry)
-    for item in root.findall(".//item"):
+    # IMPORTANTE: Procurar SEMPRE por <item> (não <entry>)
+    for item in _iter_items(feed_path):
         total_items += 1
         
         # Extrair campos básicos
@@ -4,6 +4,7 @@ core/normalization.py
 Normalização de referências de produtos e extração de refs do campo description.
 """
 import re
+from functools import lru_cache
 from typing import List, Optional, Tuple
 
 
@@ -42,6 +43,10 @@ def extract_ref_from_description(desc: str) -> Optional[str]:
     return None
 
 
+# Caracteres removidos por norm_token (tabela para str.translate - uma só passagem)
+_TOKEN_STRIP = str.maketrans("", "", "-. _+")
+
+
 def norm_token(s: str) -> str:
     """
     Normaliza um token (remove hífens, pontos, espaços, underscores).
@@ -55,8 +60,7 @@ def norm_token(s: str) -> str:
     """
     if not s:
         return ""
-    s = s.replace("-", "").replace(".", "").replace(" ", "").replace("_", "").replace("+", "")
-    return s.upper()
+    return s.translate(_TOKEN_STRIP).upper()
 
 
 def normalize_reference(ref: str) -> Tuple[str, List[str]]:
@@ -76,18 +80,27 @@ def normalize_reference(ref: str) -> Tuple[str, List[str]]:
     if not ref:
         return "", []
     
+    # Cache partilhada por input já sem espaços nas pontas; devolve lista nova
+    # para quem a alterar não estragar a entrada em cache
+    ref_norm, parts = _normalize_reference_cached(ref.strip())
+    return ref_norm, list(parts)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_reference_cached(ref: str) -> Tuple[str, Tuple[str, ...]]:
+    """Implementação de normalize_reference (partes em tuple, imutável para a cache)."""
     # Se tem "+", é ref composta
     if "+" in ref:
         parts_raw = [p.strip() for p in ref.split("+") if p.strip()]
-        parts_norm = [norm_token(p) for p in parts_raw if norm_token(p)]
+        parts_norm = [token for token in map(norm_token, parts_raw) if token]
         # Ref normalizada = todas as partes juntas
         ref_norm = "".join(parts_norm)
         # Lista de partes = ref completa + partes individuais
-        return ref_norm, [ref_norm] + parts_norm
+        return ref_norm, (ref_norm, *parts_norm)
     
     # Ref simples
     normalized = norm_token(ref)
-    parts = [normalized] if normalized else []
+    parts = (normalized,) if normalized else ()
     return normalized, parts
 
 
@@ -4,19 +4,27 @@ core/selenium_utils.py
 Utilitários Selenium partilhados: driver, throttling, circuit breaker.
 VERSÃO OTIMIZADA PARA STREAMLIT CLOUD
 """
+import os
 import time
 import random
+import atexit
+import threading
+import weakref
 from collections import deque
-from typing import Optional
+from typing import Optional, Dict, List
+from urllib.parse import urlparse
 
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
 from config import (
-    HEADLESS, WINDOW_SIZE, PAGE_LOAD_TIMEOUT, USER_AGENT_LANGS,
+    HEADLESS, WINDOW_SIZE, PAGE_LOAD_TIMEOUT, USER_AGENT_LANGS, HTTP_USER_AGENT,
     MIN_GAP_SECONDS, PAUSE_RANGE, SLOW_MODE_MULTIPLIER,
     MAX_RETRIES, BACKOFF_BASE,
     CIRCUIT_BREAKER_WINDOW, CIRCUIT_BREAKER_THRESHOLD
@@ -26,32 +34,39 @@ from config import (
 # ============================================================================
 # RATE LIMITING & CIRCUIT BREAKER (globais para toda sessão)
 # ============================================================================
+# Thread-safe: as lojas são pesquisadas em paralelo (um driver por loja),
+# por isso o gap mínimo é aplicado POR HOST e não globalmente.
 
-_last_navigation_time = 0.0
+_lock = threading.Lock()
+_last_navigation_time: Dict[str, float] = {}  # host -> próxima navegação permitida
 _min_gap = MIN_GAP_SECONDS
 _fail_window = deque(maxlen=CIRCUIT_BREAKER_WINDOW)
 
 
-def throttle() -> None:
+def throttle(url: str = "") -> None:
     """
-    Rate limiting: garante gap mínimo entre navegações.
+    Rate limiting: garante gap mínimo entre navegações ao mesmo host.
     
-    Calcula tempo desde última navegação, espera se necessário,
-    adiciona pausa aleatória extra.
+    Reserva o próximo slot livre do host (sob lock) e só depois espera,
+    para que threads de lojas diferentes não se bloqueiem entre si.
+    Inclui pausa aleatória extra.
+    
+    Args:
+        url: URL que vai ser carregado (define o host)
     """
-    global _last_navigation_time
+    host = urlparse(url).netloc
     
-    # Calcular quanto tempo passou desde última navegação
-    elapsed = time.time() - _last_navigation_time
-    need_to_wait = max(0.0, _min_gap - elapsed)
+    with _lock:
+        now = time.time()
+        last = _last_navigation_time.get(host, 0.0)
+        
+        # Gap mínimo desde a última navegação + pausa aleatória (parece mais humano)
+        slot = max(now, last + _min_gap) + random.uniform(*PAUSE_RANGE)
+        _last_navigation_time[host] = slot
     
+    need_to_wait = slot - time.time()
     if need_to_wait > 0:
         time.sleep(need_to_wait)
-    
-    # Pausa aleatória adicional (parece mais humano)
-    time.sleep(random.uniform(*PAUSE_RANGE))
-    
-    _last_navigation_time = time.time()
 
 
 def set_slow_mode(enable: bool) -> None:
@@ -75,18 +90,21 @@ def record_navigation_result(success: bool) -> None:
     Args:
         success: True se navegação bem-sucedida, False se falhou
     """
-    _fail_window.append(0 if success else 1)
-    
-    # Só analisar se janela tiver dados suficientes
-    if len(_fail_window) >= 10:
-        fail_rate = sum(_fail_window) / len(_fail_window)
+    with _lock:
+        _fail_window.append(0 if success else 1)
         
-        if fail_rate > CIRCUIT_BREAKER_THRESHOLD:
-            set_slow_mode(True)
-            # Log (opcional)
-            # print(f"[CIRCUIT BREAKER] Taxa de falha {fail_rate:.1%} > {CIRCUIT_BREAKER_THRESHOLD:.0%}, modo lento ativado")
-        else:
-            set_slow_mode(False)
+        # Só analisar se janela tiver dados suficientes
+        if len(_fail_window) < 10:
+            return
+        
+        fail_rate = sum(_fail_window) / len(_fail_window)
+    
+    if fail_rate > CIRCUIT_BREAKER_THRESHOLD:
+        set_slow_mode(True)
+        # Log (opcional)
+        # print(f"[CIRCUIT BREAKER] Taxa de falha {fail_rate:.1%} > {CIRCUIT_BREAKER_THRESHOLD:.0%}, modo lento ativado")
+    else:
+        set_slow_mode(False)
 
 
 def get_rate_limiting_stats() -> dict:
@@ -96,13 +114,15 @@ def get_rate_limiting_stats() -> dict:
     Returns:
         Dict com min_gap atual e taxa de falha recente
     """
-    fail_rate = sum(_fail_window) / len(_fail_window) if _fail_window else 0.0
+    with _lock:
+        fail_rate = sum(_fail_window) / len(_fail_window) if _fail_window else 0.0
+        window_size = len(_fail_window)
     
     return {
         "min_gap_seconds": _min_gap,
         "slow_mode": _min_gap > MIN_GAP_SECONDS,
         "recent_fail_rate": fail_rate,
-        "window_size": len(_fail_window),
+        "window_size": window_size,
     }
 
 
@@ -110,6 +130,42 @@ def get_rate_limiting_stats() -> dict:
 # DRIVER MANAGEMENT
 # ============================================================================
 
+# Recursos bloqueados no Chrome (não influenciam preços nem resultados de pesquisa)
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm",
+    "*/analytics*", "*googletag*", "*facebook.net*",
+]
+
+# Chromium instalado pelo sistema (Streamlit Cloud, via packages.txt)
+SYSTEM_CHROMIUM = "/usr/bin/chromium"
+SYSTEM_CHROMEDRIVER = "/usr/bin/chromedriver"
+
+# Drivers vivos - fechados à saída do processo (a app mantém-nos num
+# DriverPool entre corridas e não faz quit() no fim de cada pesquisa)
+_active_drivers = weakref.WeakSet()
+
+
+def quit_all_drivers() -> None:
+    """Fecha todos os Chrome ainda abertos (registado com atexit)."""
+    for driver in list(_active_drivers):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+atexit.register(quit_all_drivers)
+
+
+def _quit_quietly(driver) -> None:
+    """quit() ignorando erros (Chrome que já morreu)."""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
 def build_driver(headless: bool = HEADLESS) -> webdriver.Chrome:
     """
     Cria instância do Chrome WebDriver com configurações otimizadas.
@@ -131,6 +187,7 @@ def build_driver(headless: bool = HEADLESS) -> webdriver.Chrome:
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
     opts.add_argument(f"--window-size={WINDOW_SIZE}")
     opts.add_argument(f"--lang={USER_AGENT_LANGS}")
     
@@ -139,6 +196,11 @@ def build_driver(headless: bool = HEADLESS) -> webdriver.Chrome:
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
     opts.add_experimental_option("useAutomationExtension", False)
     
+    # Não descarregar imagens (só precisamos do HTML/texto dos preços)
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+    
     # ✅ CORRIGIDO: Service com tratamento de erro para cloud
     try:
         # Tentar com ChromeDriverManager (funciona local e alguns clouds)
@@ -161,9 +223,16 @@ def build_driver(headless: bool = HEADLESS) -> webdriver.Chrome:
         opts_basic.add_argument("--headless=new")
         opts_basic.add_argument("--no-sandbox")
         opts_basic.add_argument("--disable-dev-shm-usage")
-        driver = webdriver.Chrome(options=opts_basic)
+        
+        # Streamlit Cloud: Chromium/chromedriver do sistema (packages.txt)
+        if os.path.exists(SYSTEM_CHROMIUM) and os.path.exists(SYSTEM_CHROMEDRIVER):
+            opts_basic.binary_location = SYSTEM_CHROMIUM
+            driver = webdriver.Chrome(service=Service(SYSTEM_CHROMEDRIVER), options=opts_basic)
+        else:
+            driver = webdriver.Chrome(options=opts_basic)
     
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    _active_drivers.add(driver)
     
     # Script anti-detecção
     try:
@@ -173,42 +242,177 @@ def build_driver(headless: bool = HEADLESS) -> webdriver.Chrome:
     except Exception:
         pass  # Não crítico se falhar
     
+    # Bloquear pedidos que não afetam o HTML (fontes, imagens, media)
+    # CSS continua a carregar - os scrapers dependem de elementos visíveis/clicáveis
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+    except Exception:
+        pass  # Não crítico se falhar (ex: driver sem CDP)
+    
     return driver
 
 
+class DriverPool:
+    """
+    Chrome reutilizáveis entre corridas, com uso exclusivo.
+    
+    WebDriver não é thread-safe: acquire() entrega um driver que mais
+    ninguém usa até ser devolvido com release(). Um worker de uma corrida
+    interrompida fica com o seu driver até terminar a pesquisa em curso -
+    uma corrida nova (ou outra sessão) recebe outro driver em vez de
+    partilhar o mesmo.
+    
+    Os Chrome devolvidos ficam em espera até max_idle; os que sobram são
+    fechados (cada Chrome parado continua a ocupar memória).
+    """
+    
+    def __init__(self, headless: bool = HEADLESS, max_idle: Optional[int] = None):
+        self.headless = headless
+        self.max_idle = max_idle
+        self._idle: List[webdriver.Chrome] = []
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> webdriver.Chrome:
+        """Driver livre do pool (cookies limpos) ou um Chrome novo."""
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            
+            if driver is None:
+                return build_driver(headless=self.headless)
+            
+            # Chrome que morreu entretanto: descartar e tentar o próximo
+            try:
+                driver.delete_all_cookies()
+                return driver
+            except Exception:
+                _quit_quietly(driver)
+    
+    def release(self, driver: webdriver.Chrome) -> None:
+        """Devolve o driver ao pool (só quando quem o pediu já não o usa)."""
+        with self._lock:
+            if self.max_idle is None or len(self._idle) < self.max_idle:
+                self._idle.append(driver)
+                return
+        _quit_quietly(driver)
+    
+    def set_max_idle(self, max_idle: int) -> None:
+        """Altera o limite de Chrome em espera, fechando os que sobram."""
+        with self._lock:
+            self.max_idle = max_idle
+            extra = self._idle[max_idle:]
+            del self._idle[max_idle:]
+        for driver in extra:
+            _quit_quietly(driver)
+
+
+# ============================================================================
+# HTTP SIMPLES (lojas sem JavaScript)
+# ============================================================================
+
+# Respostas que indicam loja a bloquear (as 5xx também contam como erro da loja)
+HTTP_BLOCKED_STATUS = (403, 429)
+
+
+class HttpStatusError(Exception):
+    """
+    Resposta HTTP de bloqueio (403/429) ou de servidor em baixo (5xx).
+    
+    Não é "produto não encontrado": safe_get propaga-a para o scraper
+    registar erro em vez de guardar o None em cache. Outros 4xx (ex: 404
+    num link de produto morto) não levantam isto - ver HttpDriver.get.
+    """
+    
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} em {url}")
+        self.status_code = status_code
+
+
+class HttpDriver:
+    """
+    Substituto leve do WebDriver para lojas com HTML estático.
+    
+    Implementa só o subconjunto usado pelos scrapers com requires_js=False
+    (get, page_source, current_url, delete_all_cookies, quit) sobre uma
+    requests.Session com keep-alive - sem arrancar um Chrome.
+    """
+    
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": HTTP_USER_AGENT,
+            "Accept-Language": USER_AGENT_LANGS,
+        })
+        self.current_url = ""
+        self.page_source = ""
+    
+    def get(self, url: str) -> None:
+        """
+        Carrega URL (segue redirects).
+        
+        Raises:
+            HttpStatusError: 403/429 ou 5xx (loja a bloquear/em baixo)
+            requests.HTTPError: outros 4xx (ex: 404 - a página não existe)
+        """
+        response = self.session.get(url, timeout=PAGE_LOAD_TIMEOUT)
+        if response.status_code in HTTP_BLOCKED_STATUS or response.status_code >= 500:
+            raise HttpStatusError(response.status_code, url)
+        response.raise_for_status()
+        
+        self.current_url = response.url
+        self.page_source = response.text
+    
+    def delete_all_cookies(self) -> None:
+        self.session.cookies.clear()
+    
+    def quit(self) -> None:
+        self.session.close()
+
+
 def safe_get(driver: webdriver.Chrome, url: str, 
              retries: int = MAX_RETRIES) -> bool:
     """
     Navega para URL com retry automático e rate limiting.
     
     Args:
-        driver: Instância do WebDriver
+        driver: Instância do WebDriver (ou HttpDriver)
         url: URL para carregar
         retries: Número de tentativas (padrão: MAX_RETRIES)
         
     Returns:
         True se carregou com sucesso, False se todas tentativas falharam
+        
+    Raises:
+        HttpStatusError: HttpDriver recebeu 403/429/5xx em todas as tentativas
     """
     for attempt in range(retries):
         try:
-            # Rate limiting
-            throttle()
+            # Rate limiting (por host)
+            throttle(url)
             
             # Navegar
             driver.get(url)
             
-            # Esperar página completamente carregada
-            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
-            
-            # Pequena pausa extra (garante JS assíncronos)
-            time.sleep(0.4)
+            # HTML estático já chega completo - só o Chrome espera pelo JS
+            if not isinstance(driver, HttpDriver):
+                # Esperar página completamente carregada
+                WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+                    lambda d: d.execute_script("return document.readyState") == "complete"
+                )
+                
+                # Pequena pausa extra (garante JS assíncronos)
+                time.sleep(0.4)
             
             # Sucesso!
             record_navigation_result(True)
             return True
         
+        except requests.HTTPError:
+            # 404/410...: resposta definitiva, não vale a pena repetir - o
+            # scraper trata a página como não carregada e passa à seguinte
+            return False
+        
         except Exception as e:
             # Falhou
             record_navigation_result(False)
@@ -217,6 +421,10 @@ def safe_get(driver: webdriver.Chrome, url: str,
             if attempt < retries - 1:
                 wait_time = (BACKOFF_BASE ** attempt) + random.random()
                 time.sleep(wait_time)
+            elif isinstance(e, HttpStatusError):
+                # Loja respondeu com erro (bloqueio/servidor em baixo): o
+                # scraper tem de contar erro, não "não encontrado"
+                raise
             # else: última tentativa falhou, retornar False
     
     # Todas tentativas falharam
@@ -233,6 +441,9 @@ def get_page_html(driver: webdriver.Chrome, url: str) -> Optional[str]:
         
     Returns:
         HTML da página como string, ou None se falhou
+        
+    Raises:
+        HttpStatusError: ver safe_get
     """
     success = safe_get(driver, url)
     
@@ -242,6 +453,40 @@ def get_page_html(driver: webdriver.Chrome, url: str) -> Optional[str]:
         return None
 
 
+# Um único round-trip ao browser: cada find_element/get_attribute é um pedido
+# HTTP ao chromedriver, por isso recolhemos os hrefs todos dentro da página.
+_COLLECT_HREFS_JS = """
+const containers = arguments[1] ? document.querySelectorAll(arguments[0]) : [document];
+const hrefs = [];
+for (const c of containers) {
+    const links = arguments[1] ? [c.querySelector(arguments[1])] : c.querySelectorAll(arguments[0]);
+    for (const a of links) {
+        if (a && a.href) hrefs.push(a.href);
+    }
+}
+return hrefs;
+"""
+
+
+def collect_hrefs(driver: webdriver.Chrome, selector: str,
+                  link_selector: Optional[str] = None) -> List[str]:
+    """
+    Recolhe hrefs absolutos numa só chamada execute_script.
+    
+    Args:
+        driver: Instância do WebDriver
+        selector: Seletor CSS dos links (ou dos containers, se link_selector)
+        link_selector: Seletor do primeiro link dentro de cada container
+        
+    Returns:
+        Lista de hrefs pela ordem do DOM (pode conter duplicados)
+    """
+    try:
+        return driver.execute_script(_COLLECT_HREFS_JS, selector, link_selector) or []
+    except Exception:
+        return []
+
+
 # ============================================================================
 # COOKIES & POPUPS
 # ============================================================================
@@ -260,9 +505,6 @@ def try_accept_cookies(driver: webdriver.Chrome, timeout: int = 3) -> bool:
     Returns:
         True se clicou, False se não encontrou
     """
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support import expected_conditions as EC
-    
     # Seletores comuns de botões de cookies
     selectors = [
         (By.ID, "onetrust-accept-btn-handler"),
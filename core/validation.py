@@ -4,6 +4,7 @@ core/validation.py - Validação de produtos
 v4.9.2 - NOVA CORREÇÃO: Rejeita kits quando procura ref simples
 v4.9.1 - Corrigido fuzzy match para refs compostas
 """
+import re
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Dict, Optional
@@ -98,7 +99,6 @@ def validate_product_match(our_parts: List[str], page_identifiers: Dict[str, Lis
         url_normalized = norm_token(page_url)
         if '+' in page_url:  # URL tem +, pode ser ref composta
             # Extrair possíveis refs compostas do URL
-            import re
             # Padrão: algo+algo (refs compostas no URL)
             composite_pattern = re.compile(r'([A-Z0-9]+\+[A-Z0-9]+)', re.I)
             url_composites = composite_pattern.findall(page_url)
@@ -19,7 +19,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.cache import StoreCache
-from core.validation import ValidationResult
+from core.validation import ValidationResult, MatchType
 
 
 @dataclass
@@ -56,8 +56,13 @@ class BaseScraper(ABC):
     
     Cada loja herda e implementa:
     - search_product() - lógica específica de busca
+    
+    requires_js: False nas lojas cujas páginas de pesquisa/produto são HTML
+    estático - recebem um HttpDriver (requests) em vez de um Chrome.
     """
     
+    requires_js: bool = True
+    
     def __init__(self, name: str, base_url: str):
         """
         Args:
@@ -69,6 +74,15 @@ class BaseScraper(ABC):
         self.cache = StoreCache(name)
         
         # Estatísticas
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """
+        Zera estatísticas (novo dict, não altera o anterior).
+        
+        Usado quando a mesma instância é reutilizada entre corridas
+        (ex: scraper em cache no Streamlit) para as métricas serem por corrida.
+        """
         self.stats = {
             "total_searches": 0,
             "cache_hits": 0,
@@ -76,6 +90,7 @@ class BaseScraper(ABC):
             "found": 0,
             "not_found": 0,
             "errors": 0,
+            "aborted": None,            # Motivo se a loja foi abandonada a meio da corrida
         }
     
     @abstractmethod
@@ -127,7 +142,6 @@ class BaseScraper(ABC):
                 
                 # Converter CacheEntry para SearchResult
                 # (ValidationResult não é guardado em cache, criar dummy)
-                from core.validation import ValidationResult, MatchType
                 dummy_validation = ValidationResult(
                     is_valid=bool(cached.url),
                     match_type=MatchType.EXACT_MATCH,
@@ -156,28 +170,12 @@ class BaseScraper(ABC):
             
             if result:
                 self.stats["found"] += 1
-                
-                # Guardar em cache
-                if use_cache:
-                    self.cache.put(
-                        ref_norm=ref_norm,
-                        url=result.url,
-                        price_text=result.price_text,
-                        price_num=result.price_num,
-                        confidence=result.confidence
-                    )
             else:
                 self.stats["not_found"] += 1
-                
-                # Guardar "não encontrado" em cache (evita buscas repetidas)
-                if use_cache:
-                    self.cache.put(
-                        ref_norm=ref_norm,
-                        url=None,
-                        price_text=None,
-                        price_num=None,
-                        confidence=0.0
-                    )
+            
+            # Guardar em cache ("não encontrado" também - evita buscas repetidas)
+            if use_cache:
+                self.cache_result(ref_norm, result)
             
             return result
         
@@ -186,6 +184,31 @@ class BaseScraper(ABC):
             print(f"[ERRO] {self.name}: {e}")
             return None
     
+    def cache_result(self, ref_norm: str, result: Optional[SearchResult]) -> None:
+        """
+        Guarda resultado de uma busca real em cache (substitui o anterior).
+        
+        Args:
+            ref_norm: Referência normalizada (cache key)
+            result: SearchResult, ou None se não encontrado
+        """
+        if result:
+            self.cache.put(
+                ref_norm=ref_norm,
+                url=result.url,
+                price_text=result.price_text,
+                price_num=result.price_num,
+                confidence=result.confidence
+            )
+        else:
+            self.cache.put(
+                ref_norm=ref_norm,
+                url=None,
+                price_text=None,
+                price_num=None,
+                confidence=0.0
+            )
+    
     def get_stats(self) -> Dict:
         """
         Retorna estatísticas do scraper.
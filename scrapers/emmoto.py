@@ -9,13 +9,12 @@ Características:
 - Preços em data-price-amount
 """
 import re
+import json
+import traceback
 from typing import Optional, List, Dict
 from urllib.parse import quote_plus
 
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 
 import sys
@@ -23,8 +22,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.validation import validate_product_match
-from core.selenium_utils import get_page_html, try_accept_cookies
-from config import STORE_URLS
+from core.selenium_utils import get_page_html, HttpStatusError
+from config import STORE_URLS, LOG_LEVEL
 from .base import BaseScraper, SearchResult, parse_price_to_float
 
 
@@ -34,6 +33,8 @@ CODE_SCAN = re.compile(r"[A-Z0-9][A-Z0-9\.\-_+]{2,}", re.I)
 class EMMotoScraper(BaseScraper):
     """Scraper para EM Moto"""
     
+    requires_js = False  # Magento: resultados e preços vêm no HTML
+    
     def __init__(self):
         super().__init__(
             name="emmoto",
@@ -73,26 +74,19 @@ class EMMotoScraper(BaseScraper):
         
         try:
             # Ir direto para página de resultados
-            driver.get(search_url)
-            
-            # Aceitar cookies se aparecerem
-            try_accept_cookies(driver)
+            html = get_page_html(driver, search_url)
+            if not html:
+                print(f"  [EM Moto] ❌ Falha ao abrir página de resultados")
+                return None
             
-            import time
-            time.sleep(1.5)  # Esperar página carregar
+            soup = BeautifulSoup(html, "lxml")
             
             # Verificar se há resultados
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".products.list.items.product-items"))
-                )
-                print(f"  [EM Moto] ✓ Página de resultados carregada")
-            except Exception:
+            if not soup.select_one(".products.list.items.product-items"):
                 print(f"  [EM Moto] ❌ Sem resultados para esta pesquisa")
                 return None
             
-            # Extrair HTML
-            soup = BeautifulSoup(driver.page_source, "lxml")
+            print(f"  [EM Moto] ✓ Página de resultados carregada")
             
             # Procurar produtos
             products = soup.select("li.item.product.product-item")
@@ -163,6 +157,8 @@ class EMMotoScraper(BaseScraper):
                             validation=validation
                         )
                 
+                except HttpStatusError:
+                    raise  # Loja a bloquear/em baixo - não é "sem match"
                 except Exception as e:
                     print(f"  [EM Moto]       ⚠️  Erro ao processar produto: {e}")
                     continue
@@ -170,10 +166,12 @@ class EMMotoScraper(BaseScraper):
             print(f"  [EM Moto] ⚠️  Nenhum match válido encontrado")
             return None
         
+        except HttpStatusError:
+            raise  # Erro de loja (search_with_cache conta e não guarda em cache)
         except Exception as e:
             print(f"  [EM Moto] ❌ ERRO: {e}")
-            import traceback
-            traceback.print_exc()
+            if LOG_LEVEL == "DEBUG":
+                traceback.print_exc()  # Stack completo só em debug (loja instável = muitas falhas)
             return None
     
     def _extract_price_from_listing(self, product_element) -> Optional[str]:
@@ -262,7 +260,6 @@ class EMMotoScraper(BaseScraper):
                 return price_text
         
         # MÉTODO 5: JSON-LD (fallback)
-        import json
         for script_tag in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script_tag.string or "")
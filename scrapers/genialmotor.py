@@ -4,6 +4,7 @@ scrapers/genialmotor.py
 Scraper para GenialMotor.it
 """
 import re
+import json
 from typing import Optional, List, Dict
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -12,6 +13,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from core.normalization import norm_token
 from core.validation import validate_product_match, extract_codes_from_text
 from core.selenium_utils import get_page_html
 from config import STORE_URLS, MAX_URLS_SIMPLE, MAX_URLS_COMPOSITE
@@ -23,6 +25,8 @@ TOKEN_RE = re.compile(r"[A-Z0-9][A-Z0-9\.\-_+]{2,}", re.I)
 class GenialMotorScraper(BaseScraper):
     """Scraper para GenialMotor.it"""
     
+    requires_js = False  # Pesquisa por URL, HTML estático
+    
     def __init__(self):
         super().__init__(
             name="genialmotor",
@@ -107,7 +111,6 @@ class GenialMotorScraper(BaseScraper):
         soup = BeautifulSoup(html, "lxml")
         ids = {"sku": [], "mpn": [], "codes": []}
         
-        import json
         for script_tag in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script_tag.string or "")
@@ -169,8 +172,6 @@ class GenialMotorScraper(BaseScraper):
         candidates_specific = []
         all_product_links = []
         
-        from core.normalization import norm_token
-        
         for a in soup.find_all("a", href=True):
             href = a["href"]
             
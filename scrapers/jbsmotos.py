@@ -3,7 +3,7 @@
 scrapers/jbsmotos.py
 Scraper para JBS-Motos.pt
 
-Site PrestaShop com busca simples.
+Site PrestaShop com busca simples (HTML estático, sem Chrome).
 Estratégia:
 1. Abrir página de pesquisa direta com query
 2. Extrair produtos da página de resultados (class="product-miniature")
@@ -11,20 +11,20 @@ Estratégia:
 4. Validar match e extrair preço
 """
 import re
+import json
 from typing import Optional, List, Dict
+from urllib.parse import quote, urljoin
 
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from core.normalization import norm_token
 from core.validation import validate_product_match
-from core.selenium_utils import get_page_html, try_accept_cookies
+from core.selenium_utils import get_page_html
 from config import STORE_URLS
 from .base import BaseScraper, SearchResult, extract_price_from_html, parse_price_to_float
 
@@ -32,6 +32,8 @@ from .base import BaseScraper, SearchResult, extract_price_from_html, parse_pric
 class JBSMotosScraper(BaseScraper):
     """Scraper para JBS-Motos.pt"""
     
+    requires_js = False  # PrestaShop: resultados vêm no HTML
+    
     def __init__(self):
         super().__init__(
             name="jbsmotos",
@@ -61,13 +63,13 @@ class JBSMotosScraper(BaseScraper):
         print(f"[JBS] Procurando: {ref_query}")
         
         # Abrir página de resultados
-        success = self._open_search_results(driver, ref_query)
-        if not success:
+        html = self._open_search_results(driver, ref_query)
+        if not html:
             print(f"[JBS] ❌ Falha ao abrir página de resultados")
             return None
         
         # Extrair links de produtos
-        product_links = self._extract_product_links(driver)
+        product_links = self._extract_product_links(html)
         
         if not product_links:
             print(f"[JBS] ⚠️  Nenhum produto encontrado")
@@ -123,42 +125,26 @@ class JBSMotosScraper(BaseScraper):
         print(f"[JBS] ❌ Nenhum produto válido encontrado")
         return None
     
-    def _open_search_results(self, driver: webdriver.Chrome, query: str) -> bool:
+    def _open_search_results(self, driver: webdriver.Chrome, query: str) -> Optional[str]:
         """
         Abre página de resultados de busca.
         
         URL pattern: https://jbs-motos.pt/pt/search?controller=search&s=P-HF1595
         
         Args:
-            driver: WebDriver
+            driver: WebDriver (ou HttpDriver)
             query: Query de busca
             
         Returns:
-            True se sucesso, False caso contrário
+            HTML da página de resultados, ou None se falhou
         """
-        try:
-            # URL de busca (língua portuguesa)
-            search_url = f"{self.base_url}pt/search?controller=search&s={query}"
-            driver.get(search_url)
-            
-            # Aceitar cookies se aparecerem
-            try_accept_cookies(driver)
-            
-            # Esperar pela página carregar (produtos ou mensagem "sem resultados")
-            WebDriverWait(driver, 10).until(
-                lambda d: (
-                    len(d.find_elements(By.CSS_SELECTOR, ".product-miniature")) > 0 or
-                    "Resultados da pesquisa" in d.page_source
-                )
-            )
-            
-            return True
-        
-        except Exception as e:
-            print(f"[JBS] ❌ Erro ao abrir resultados: {e}")
-            return False
+        # URL de busca (língua portuguesa). "+" vai tal como está (o site lê-o
+        # como espaço - refs compostas "A+B" pesquisam "A B", como quando a
+        # URL era aberta no Chrome); o resto é codificado
+        search_url = f"{self.base_url}pt/search?controller=search&s={quote(query, safe='+')}"
+        return get_page_html(driver, search_url)
     
-    def _extract_product_links(self, driver: webdriver.Chrome) -> List[str]:
+    def _extract_product_links(self, html: str) -> List[str]:
         """
         Extrai links de produtos da página de resultados.
         
@@ -167,33 +153,21 @@ class JBSMotosScraper(BaseScraper):
         - Link dentro de <h3><a>
         
         Args:
-            driver: WebDriver
+            html: HTML da página de resultados
             
         Returns:
             Lista de URLs (sem duplicados)
         """
+        soup = BeautifulSoup(html, "lxml")
         links = []
         seen = set()
         
-        try:
-            # Encontrar todos os produtos
-            products = driver.find_elements(By.CSS_SELECTOR, ".product-miniature")
+        for link_elem in soup.select(".product-miniature h3 a[href]"):
+            href = urljoin(self.base_url, link_elem["href"])
             
-            for product in products:
-                try:
-                    # Procurar link dentro do título (h3 > a)
-                    link_elem = product.find_element(By.CSS_SELECTOR, "h3 a")
-                    href = link_elem.get_attribute("href")
-                    
-                    if href and href not in seen:
-                        seen.add(href)
-                        links.append(href)
-                
-                except Exception:
-                    continue
-        
-        except Exception as e:
-            print(f"[JBS] ⚠️  Erro ao extrair links: {e}")
+            if href not in seen:
+                seen.add(href)
+                links.append(href)
         
         return links
     
@@ -248,7 +222,6 @@ class JBSMotosScraper(BaseScraper):
             pattern = re.compile(r"\b([A-Z0-9][\w\-\.+]{2,})\b", re.I)
             for match in pattern.finditer(title):
                 code = match.group(1).upper()
-                from core.normalization import norm_token
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
         
@@ -259,12 +232,10 @@ class JBSMotosScraper(BaseScraper):
             pattern = re.compile(r"\b([A-Z0-9][\w\-\.+]{3,})\b", re.I)
             for match in pattern.finditer(content):
                 code = match.group(1).upper()
-                from core.normalization import norm_token
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
         
         # 4. JSON-LD (se existir)
-        import json
         for script in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script.string or "")
@@ -10,6 +10,7 @@ Estratégia:
 3. Visitar cada produto, validar SKU e extrair preço
 """
 import re
+import json
 import time
 from typing import Optional, List, Dict
 
@@ -23,8 +24,9 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from core.normalization import norm_token
 from core.validation import validate_product_match
-from core.selenium_utils import get_page_html, try_accept_cookies
+from core.selenium_utils import get_page_html, try_accept_cookies, collect_hrefs
 from config import STORE_URLS
 from .base import BaseScraper, SearchResult, extract_price_from_html, parse_price_to_float
 
@@ -182,36 +184,16 @@ class MMGRacingStoreScraper(BaseScraper):
         
         try:
             # Método 1: Cards do dropdown (classe dfd-card)
-            cards = driver.find_elements(By.CSS_SELECTOR, ".dfd-card")
-            
-            for card in cards:
-                try:
-                    # Procurar link dentro do card
-                    link_elem = card.find_element(By.CSS_SELECTOR, "a")
-                    href = link_elem.get_attribute("href")
-                    
-                    if href and href not in seen:
-                        seen.add(href)
-                        links.append(href)
-                
-                except Exception:
-                    continue
+            hrefs = collect_hrefs(driver, ".dfd-card", "a")
             
             # Método 2: Produtos normais PrestaShop (fallback)
-            if not links:
-                products = driver.find_elements(By.CSS_SELECTOR, ".product-miniature")
-                
-                for product in products:
-                    try:
-                        link_elem = product.find_element(By.CSS_SELECTOR, "a.product-thumbnail, h3 a, h2 a")
-                        href = link_elem.get_attribute("href")
-                        
-                        if href and href not in seen:
-                            seen.add(href)
-                            links.append(href)
-                    
-                    except Exception:
-                        continue
+            if not hrefs:
+                hrefs = collect_hrefs(driver, ".product-miniature", "a.product-thumbnail, h3 a, h2 a")
+            
+            for href in hrefs:
+                if href not in seen:
+                    seen.add(href)
+                    links.append(href)
         
         except Exception as e:
             print(f"[MMG] ⚠️  Erro ao extrair links: {e}")
@@ -292,7 +274,6 @@ class MMGRacingStoreScraper(BaseScraper):
             pattern = re.compile(r"\b([A-Z0-9][\w\-\.+]{2,})\b", re.I)
             for match in pattern.finditer(title):
                 code = match.group(1).upper()
-                from core.normalization import norm_token
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
         
@@ -303,12 +284,10 @@ class MMGRacingStoreScraper(BaseScraper):
             pattern = re.compile(r"\b([A-Z0-9][\w\-\.+]{3,})\b", re.I)
             for match in pattern.finditer(content):
                 code = match.group(1).upper()
-                from core.normalization import norm_token
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
         
         # 4. JSON-LD (se existir)
-        import json
         for script in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script.string or "")
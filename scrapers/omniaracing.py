@@ -11,6 +11,8 @@ Estratégia (do código original que funciona):
 5. Tentar EN primeiro, depois IT se falhar
 """
 import re
+import json
+import time
 from typing import Optional, List, Dict
 
 from selenium import webdriver
@@ -24,8 +26,9 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from core.normalization import norm_token
 from core.validation import validate_product_match, extract_codes_from_text
-from core.selenium_utils import get_page_html, try_accept_cookies
+from core.selenium_utils import get_page_html, try_accept_cookies, collect_hrefs
 from config import STORE_URLS
 from .base import BaseScraper, SearchResult, extract_price_from_html, parse_price_to_float
 
@@ -157,7 +160,6 @@ class OmniaRacingScraper(BaseScraper):
         # Tentar aceitar cookies
         try_accept_cookies(driver)
         
-        import time
         time.sleep(0.5)
         
         # Tentar encontrar campo de busca
@@ -219,21 +221,13 @@ class OmniaRacingScraper(BaseScraper):
         Returns:
             Lista de URLs (sem duplicados)
         """
-        anchors = driver.find_elements(By.CSS_SELECTOR, "a[href*='-p-']")
-        
         links = []
         seen = set()
         
-        for anchor in anchors:
-            try:
-                href = anchor.get_attribute("href") or ""
-                
-                if href and "omniaracing.net" in href and href not in seen:
-                    seen.add(href)
-                    links.append(href)
-            
-            except Exception:
-                continue
+        for href in collect_hrefs(driver, "a[href*='-p-']"):
+            if "omniaracing.net" in href and href not in seen:
+                seen.add(href)
+                links.append(href)
         
         return links
     
@@ -262,7 +256,6 @@ class OmniaRacingScraper(BaseScraper):
             if match:
                 block = match.group(1).strip()
                 for token in block.split():
-                    from core.normalization import norm_token
                     if len(norm_token(token)) >= 3:
                         ids["codes"].append(token.upper())
         
@@ -272,7 +265,6 @@ class OmniaRacingScraper(BaseScraper):
             title = title_tag.string or ""
             match = TITLE_REF_PATTERN.search(title)
             if match:
-                from core.normalization import norm_token
                 code = match.group(1).strip().upper()
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
@@ -282,13 +274,11 @@ class OmniaRacingScraper(BaseScraper):
             src = img.get("src", "")
             match = IMG_REF_PATTERN.search(src)
             if match:
-                from core.normalization import norm_token
                 code = match.group(1).strip().upper()
                 if len(norm_token(code)) >= 3:
                     ids["codes"].append(code)
         
         # 4. JSON-LD (SKU/MPN)
-        import json
         for script in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script.string or "")
@@ -6,6 +6,9 @@ Scraper para WRS.it - VERSÃO CORRIGIDA (Nov 2025)
 Usa o sistema SniperFast de search que a WRS implementa.
 """
 import re
+import json
+import time
+import traceback
 from typing import Optional, List, Dict
 
 from selenium import webdriver
@@ -21,7 +24,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.validation import validate_product_match, extract_codes_from_text
 from core.selenium_utils import get_page_html, try_accept_cookies
-from config import STORE_URLS
+from config import STORE_URLS, LOG_LEVEL
 from .base import BaseScraper, SearchResult, parse_price_to_float
 
 
@@ -65,7 +68,6 @@ class WRSScraper(BaseScraper):
         # Aceitar cookies
         try_accept_cookies(driver)
         
-        import time
         time.sleep(0.5)
         
         # Procurar campo de busca
@@ -167,8 +169,8 @@ class WRSScraper(BaseScraper):
         
         except Exception as e:
             print(f"  [WRS] ❌ ERRO: {e}")
-            import traceback
-            traceback.print_exc()
+            if LOG_LEVEL == "DEBUG":
+                traceback.print_exc()  # Stack completo só em debug (loja instável = muitas falhas)
         
         print(f"  [WRS] ⚠️  Nenhum match encontrado")
         return None
@@ -223,7 +225,6 @@ class WRSScraper(BaseScraper):
                     return price_text
         
         # MÉTODO 4: JSON-LD
-        import json
         for script_tag in soup.find_all("script", type="application/ld+json"):
             try:
                 data = json.loads(script_tag.string or "")